@@ -0,0 +1,49 @@
+new MutationObserver(function() {
+  document.querySelectorAll(".shiny-ipywidget-output .js-plotly-plot").forEach(function(plot) {
+    if (plot.on && !plot.viewportListener) {
+      plot.viewportListener = true;
+      var output = plot.closest(".shiny-ipywidget-output").id;
+      plot.on("plotly_relayout", function(data) {
+        if (data && data["map._derived"]) {
+          var coordinates = data["map._derived"].coordinates;
+          Shiny.setInputValue(output + "_viewport", {
+            zoom: data["map.zoom"],
+            latitude: [Math.min(...coordinates.map(c => c[1])), Math.max(...coordinates.map(c => c[1]))],
+            longitude: [Math.min(...coordinates.map(c => c[0])), Math.max(...coordinates.map(c => c[0]))]
+          });
+        } else if (data && (data["xaxis.autorange"] || data["yaxis.autorange"])) {
+          Shiny.setInputValue(output + "_viewport", null);
+        } else if (data && ("xaxis.range[0]" in data || "yaxis.range[0]" in data)) {
+          Shiny.setInputValue(output + "_viewport", {x: plot.layout.xaxis.range.slice(), y: plot.layout.yaxis.range.slice()});
+        }
+      });
+      plot.on("plotly_selected", function(data) {
+        if (data && data.range && data.range.map) {
+          Shiny.setInputValue(output + "_selection", {range: data.range.map}, {priority: "event"});
+        } else if (data && data.lassoPoints && data.lassoPoints.map) {
+          Shiny.setInputValue(output + "_selection", {lasso: data.lassoPoints.map}, {priority: "event"});
+        }
+      });
+      plot.on("plotly_deselect", function() {
+        Shiny.setInputValue(output + "_selection", null, {priority: "event"});
+      });
+    }
+  });
+}).observe(document.documentElement, {childList: true, subtree: true});
+
+document.addEventListener("click", function(event) {
+  var table = event.target.closest(".shiny-html-output");
+  if (!table) {
+    return;
+  }
+  var header = event.target.closest("th[data-column]");
+  var row = event.target.closest("[data-id]");
+  var page = event.target.closest("button[data-page]");
+  if (header) {
+    Shiny.setInputValue(table.id + "_sort", header.dataset.column, {priority: "event"});
+  } else if (row) {
+    Shiny.setInputValue(table.id + "_select", Number(row.dataset.id), {priority: "event"});
+  } else if (page) {
+    Shiny.setInputValue(table.id + "_page", Number(page.dataset.page), {priority: "event"});
+  }
+});
@@ -1,7 +1,18 @@
+import asyncio
+import bisect
+import collections
+import concurrent.futures
+import hashlib
+import importlib
+import itertools
+import json
 import pathlib
 import re
+import sys
+import time
+import warnings
 
-import pandas as pd
+import numpy as np
 
 from shiny import module, ui, reactive, render, App
 from shinywidgets import output_widget, render_plotly
@@ -35,20 +46,1052 @@ def formatNumber(number):
         suffix = ""
     return f"{number:.3g}{suffix}"
 
-def orderAndTruncateBreakdown(df, breakdown, order = None, truncate = 5):
-    if order is None:
-        order = df[breakdown].value_counts().index.to_list()
+def discreteColourscale(colours):
+    return [[(i + j) / len(colours), colour] for i, colour in enumerate(colours) for j in [0, 1]]
+
+def mapViewport(viewport, rows):
+    return viewport() if len(rows) > MAP_MARKER_LIMIT and viewport.is_set() else None
+
+def pointsViewport(viewport, rows):
+    return viewport() if len(rows) > CARBON_POINTS_LIMIT and viewport.is_set() else None
+
+def traceKey(trace):
+    return (trace.type, getattr(trace, "legendgroup", None), trace.name)
+
+def patchTraces(widget, traces, **layout):
+    current = {traceKey(trace): trace for trace in widget.data}
+    keys = [traceKey(trace) for trace in traces]
+    kept = [trace for trace in widget.data if traceKey(trace) in keys]
+    if len(kept) < len(widget.data):
+        widget.data = kept
+    added = []
+    with widget.batch_update():
+        for key, trace in zip(keys, traces):
+            if key in current:
+                properties = {prop: value for prop, value in trace.to_plotly_json().items() if prop not in ["type", "uid"]}
+                current[key].update({**{prop: None for prop in current[key].to_plotly_json() if prop not in ["type", "uid"]}, **properties}, overwrite = True)
+            else:
+                added.append(trace)
+        widget.update_layout(**layout)
+    if len(added) > 0:
+        widget.add_traces(added)
+    order = sorted(range(0, len(widget.data)), key = lambda i: keys.index(traceKey(widget.data[i])))
+    if order != sorted(order):
+        widget.data = [widget.data[i] for i in order]
+
+#%%% CACHE
+
+def cacheKey(*parts):
+    return json.dumps(parts, sort_keys = True, separators = (",", ":"))
+
+def cacheGet(cache, key):
+    if key in cache["ENTRIES"]:
+        cache["HITS"] += 1
+        cache["ENTRIES"].move_to_end(key)
+        return cache["ENTRIES"][key]
+    cache["MISSES"] += 1
+    return None
+
+def cacheBytes(value):
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sum(cacheBytes(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(cacheBytes(item) for item in value)
+    if hasattr(value, "to_plotly_json"):
+        return cacheBytes(value.to_plotly_json())
+    return sys.getsizeof(value)
+
+def cacheSet(cache, key, value):
+    cache["ENTRIES"][key] = value
+    cache["NBYTES"][key] = cacheBytes(value)
+    while len(cache["ENTRIES"]) > cache["SIZE"] or sum(cache["NBYTES"].values()) > cache["LIMIT"]:
+        cache["NBYTES"].pop(cache["ENTRIES"].popitem(last = False)[0])
+    return value
+
+def cacheClear(cache):
+    cache["ENTRIES"].clear()
+    cache["NBYTES"].clear()
+
+def cached(cache, key, function):
+    value = cacheGet(cache, key)
+    if value is None:
+        value = cacheSet(cache, key, function())
+    return value
+
+#%%% STORE
+
+def buildStore(df):
+    pd = importlib.import_module("pandas")
+    store = {
+        "SIZE": len(df),
+        "ID": df["ID"].to_numpy(np.int64),
+        "TEXT": {column: df[column].to_numpy(object) for column in TEXT_COLUMNS},
+        "CATEGORIES": {},
+        "CODES": {},
+        "NUMERIC": {},
+        "MISSING": {},
+        "SUBAREA_COLUMNS": [column for column in df.columns if column.startswith("Subarea")]
+        }
+    for column in BREAKDOWN_COLUMNS:
+        store["CATEGORIES"][column] = df[column].value_counts().index.to_list()
+        store["CODES"][column] = pd.Categorical(df[column], store["CATEGORIES"][column]).codes.astype(np.int16)
+    for column in NUMERIC_COLUMNS:
+        values = pd.to_numeric(df[column], errors = "coerce").to_numpy(np.float64)
+        store["MISSING"][column] = np.isnan(values)
+        if np.issubdtype(NUMERIC_COLUMNS[column], np.integer):
+            values = np.where(store["MISSING"][column], 0, values)
+        store["NUMERIC"][column] = values.astype(NUMERIC_COLUMNS[column])
+    store["LOCATED"] = ~(store["MISSING"]["Latitude"] | store["MISSING"]["Longitude"])
+    store["SUBAREA_INDEX"] = subareaIndex(store["SUBAREA_COLUMNS"])
+    store["SUBAREAS"] = np.ascontiguousarray(df[store["SUBAREA_COLUMNS"]].apply(pd.to_numeric, errors = "coerce").fillna(0).to_numpy(np.float32))
+    return store
+
+def subareaIndex(columns):
+    return {
+        "Type": np.array([re.sub(".*; (.*); .*", "\\1", column) for column in columns]),
+        "Sub-type": np.array([re.sub(".*; .*; (.*)", "\\1", column) for column in columns])
+        }
+
+def storeRows(store, rows):
+    return {
+        "SIZE": len(rows),
+        "ID": store["ID"][rows],
+        "TEXT": {column: store["TEXT"][column][rows] for column in store["TEXT"]},
+        "CATEGORIES": store["CATEGORIES"],
+        "CODES": {column: store["CODES"][column][rows] for column in store["CODES"]},
+        "NUMERIC": {column: store["NUMERIC"][column][rows] for column in store["NUMERIC"]},
+        "MISSING": {column: store["MISSING"][column][rows] for column in store["MISSING"]},
+        "SUBAREA_COLUMNS": store["SUBAREA_COLUMNS"],
+        "LOCATED": store["LOCATED"][rows],
+        "SUBAREA_INDEX": store["SUBAREA_INDEX"],
+        "SUBAREAS": store["SUBAREAS"][rows]
+        }
+
+def concatStores(stores):
+    columns = list(dict.fromkeys(column for store in stores for column in store["SUBAREA_COLUMNS"]))
+    concatenated = {
+        "SIZE": sum(store["SIZE"] for store in stores),
+        "ID": np.concatenate([store["ID"] for store in stores]),
+        "TEXT": {column: np.concatenate([store["TEXT"][column] for store in stores]) for column in TEXT_COLUMNS},
+        "CATEGORIES": {},
+        "CODES": {},
+        "NUMERIC": {column: np.concatenate([store["NUMERIC"][column] for store in stores]) for column in NUMERIC_COLUMNS},
+        "MISSING": {column: np.concatenate([store["MISSING"][column] for store in stores]) for column in NUMERIC_COLUMNS},
+        "SUBAREA_COLUMNS": columns,
+        "LOCATED": np.concatenate([store["LOCATED"] for store in stores]),
+        "SUBAREA_INDEX": subareaIndex(columns),
+        "SUBAREAS": np.zeros((sum(store["SIZE"] for store in stores), len(columns)), dtype = np.float32)
+        }
+    for column in BREAKDOWN_COLUMNS:
+        names, codes, counts = np.unique(np.concatenate([storeColumn(store, column) for store in stores]).astype(str), return_inverse = True, return_counts = True)
+        order = np.argsort(-counts, kind = "stable")
+        concatenated["CATEGORIES"][column] = names[order].tolist()
+        concatenated["CODES"][column] = np.argsort(order)[codes].astype(np.int16)
+    start = 0
+    for store in stores:
+        concatenated["SUBAREAS"][start:start + store["SIZE"], [columns.index(column) for column in store["SUBAREA_COLUMNS"]]] = store["SUBAREAS"]
+        start += store["SIZE"]
+    return concatenated
+
+def storeColumn(store, column, rows = None):
+    if column in store["CODES"]:
+        return np.array(store["CATEGORIES"][column], dtype = object)[store["CODES"][column] if rows is None else store["CODES"][column][rows]]
+    if column == "ID":
+        values = store["ID"]
+    elif column in store["TEXT"]:
+        values = store["TEXT"][column]
+    elif column in store["NUMERIC"]:
+        values = store["NUMERIC"][column]
     else:
-        order = df.groupby(breakdown)[order].sum().sort_values(ascending = False).reset_index()[breakdown].to_list()
-    if len(order) > truncate:
-        order = order[0:5]
-        df[breakdown] = df[breakdown].where(df[breakdown].isin(order), "Other")
+        values = store["SUBAREAS"][:, store["SUBAREA_COLUMNS"].index(column)]
+    return values if rows is None else values[rows]
+
+def storeRecord(store, row):
+    record = {}
+    for column in ["Name", "ID", "URL", *BREAKDOWN_COLUMNS, *store["NUMERIC"], *store["SUBAREA_COLUMNS"]]:
+        value = storeColumn(store, column, row)
+        record[column] = value.item() if isinstance(value, np.generic) else value
+    return record
+
+def storeSources(previous, store):
+    rows = {value: row for row, value in enumerate(previous["ID"].tolist())}
+    sources = np.array([rows.get(value, -1) for value in store["ID"].tolist()], dtype = np.int64)
+    matched = np.flatnonzero(sources >= 0)
+    matched = matched[np.unique(sources[matched], return_index = True)[1]]
+    same = np.full(len(matched), store["SUBAREA_COLUMNS"] == previous["SUBAREA_COLUMNS"])
+    for column in [*TEXT_COLUMNS, *BREAKDOWN_COLUMNS]:
+        same &= storeColumn(store, column, matched) == storeColumn(previous, column, sources[matched])
+    for column in store["NUMERIC"]:
+        missing = store["MISSING"][column][matched]
+        same &= (missing == previous["MISSING"][column][sources[matched]]) & (missing | (store["NUMERIC"][column][matched] == previous["NUMERIC"][column][sources[matched]]))
+    if store["SUBAREA_COLUMNS"] == previous["SUBAREA_COLUMNS"]:
+        same &= (store["SUBAREAS"][matched] == previous["SUBAREAS"][sources[matched]]).all(axis = 1)
+    updated = np.full(store["SIZE"], -1)
+    updated[matched[same]] = sources[matched[same]]
+    return updated
+
+def storeTargets(sources, size):
+    kept = np.flatnonzero(sources >= 0)
+    targets = np.full(size, -1)
+    targets[sources[kept]] = kept
+    return targets
+
+def updateOrder(order, keys, targets, added):
+    kept = targets[order]
+    kept = kept[kept >= 0]
+    added = added[np.lexsort((added, keys[added]))]
+    lower = np.searchsorted(keys[kept], keys[added], side = "left")
+    upper = np.searchsorted(keys[kept], keys[added], side = "right")
+    for i in np.flatnonzero(upper > lower):
+        lower[i] += np.searchsorted(kept[lower[i]:upper[i]], added[i])
+    return np.insert(kept, lower, added)
+
+#%%% FILTERS
+
+def buildFilterIndex(store):
+    index = {"ALL": np.packbits(np.ones(store["SIZE"], dtype = bool)), "BITMAPS": {}, "CODES": {}}
+    for column in BREAKDOWN_COLUMNS:
+        index["BITMAPS"][column] = np.stack([np.packbits(store["CODES"][column] == i) for i in range(0, len(store["CATEGORIES"][column]))])
+        index["CODES"][column] = {value: i for i, value in enumerate(store["CATEGORIES"][column])}
+    return index
+
+def updateFilterIndex(index, previous, store, sources):
+    kept = np.flatnonzero(sources >= 0)
+    if not np.array_equal(sources[kept], kept):
+        return buildFilterIndex(store)
+    added = np.flatnonzero(sources < 0)
+    unchanged = np.packbits(sources >= 0)
+    updated = {"ALL": np.packbits(np.ones(store["SIZE"], dtype = bool)), "BITMAPS": {}, "CODES": {}}
+    for column in BREAKDOWN_COLUMNS:
+        bitmaps = np.zeros((len(store["CATEGORIES"][column]), len(unchanged)), dtype = np.uint8)
+        for i, value in enumerate(store["CATEGORIES"][column]):
+            if value in index["CODES"][column]:
+                bitmap = index["BITMAPS"][column][index["CODES"][column][value]][0:len(unchanged)]
+                bitmaps[i, 0:len(bitmap)] = bitmap
+        bitmaps &= unchanged
+        np.bitwise_or.at(bitmaps, (store["CODES"][column][added], added >> 3), (128 >> (added & 7)).astype(np.uint8))
+        updated["BITMAPS"][column] = bitmaps
+        updated["CODES"][column] = {value: i for i, value in enumerate(store["CATEGORIES"][column])}
+    return updated
+
+def selectionBitmap(index, column, selected):
+    if set(selected) >= index["CODES"][column].keys():
+        return index["ALL"]
+    codes = [index["CODES"][column][value] for value in selected if value in index["CODES"][column]]
+    return np.bitwise_or.reduce(index["BITMAPS"][column][codes], axis = 0, initial = 0)
+
+def facetCounts(index, store, selections, base = None):
+    columns = list(selections)
+    bitmaps = [selectionBitmap(index, column, selections[column]) for column in columns]
+    prefixes = [index["ALL"] if base is None else base]
+    for bitmap in bitmaps:
+        prefixes.append(prefixes[-1] & bitmap)
+    suffixes = [index["ALL"]]
+    for bitmap in reversed(bitmaps):
+        suffixes.insert(0, suffixes[0] & bitmap)
+    counts = {}
+    for i, column in enumerate(columns):
+        rows = np.unpackbits(prefixes[i] & suffixes[i + 1], count = store["SIZE"]).view(bool)
+        counts[column] = np.bincount(store["CODES"][column][rows], minlength = len(store["CATEGORIES"][column])).tolist()
+    return {"BITMAP": prefixes[-1], "COUNTS": counts, "CHOICES": {column: store["CATEGORIES"][column] for column in columns}}
+
+def filterSelection(selected, choices, known):
+    if set(known) <= set(selected):
+        return sorted(choices)
+    return sorted(set(selected) & set(choices))
+
+def filterRows(bitmap, size):
+    return np.flatnonzero(np.unpackbits(bitmap, count = size))
+
+#%%% SUBAREAS
+
+def groupTotals(values, groups = None, size = 1):
+    if groups is None:
+        groups = np.zeros(len(values), dtype = np.int64)
+    if values.ndim == 1:
+        return np.bincount(groups, weights = values, minlength = size)
+    totals = np.zeros((size, values.shape[1]))
+    for i in range(0, values.shape[1]):
+        totals[:, i] = np.bincount(groups, weights = values[:, i], minlength = size)
+    return totals
+
+def subareaTotals(store, rows, groups = None, size = 1):
+    return groupTotals(store["SUBAREAS"][rows], groups, size)
+
+def subareaTreemap(store, name, areas):
+    types = store["SUBAREA_INDEX"]["Type"]
+    subtypes = store["SUBAREA_INDEX"]["Sub-type"]
+    typeNames, groups = np.unique(types, return_inverse = True)
+    typeAreas = groupTotals(areas, groups, len(typeNames))
+    present = np.flatnonzero(typeAreas > 0)
+    positive = np.flatnonzero(areas > 0)
+    return {
+        "ids": [name] + typeNames[present].tolist() + [types[i] + subtypes[i] for i in positive],
+        "labels": [name] + typeNames[present].tolist() + subtypes[positive].tolist(),
+        "parents": [""] + [name] * len(present) + types[positive].tolist(),
+        "values": [typeAreas[present].sum()] + typeAreas[present].tolist() + areas[positive].tolist(),
+        "marker_colors": ["white"] + [AREA_COLOUR_PALETTE[i][""] for i in typeNames[present]] + [AREA_COLOUR_PALETTE[types[i]][subtypes[i]] for i in positive]
+        }
+
+#%%% PATHWAYS
+
+def pathwaySeries(store, rows, column, groups = None, size = 1):
+    if len(rows) == 0:
+        return np.arange(0), np.zeros((size, 0))
+    start = store["NUMERIC"]["Start Year"][rows].astype(np.int64)
+    end = store["NUMERIC"]["End Year"][rows].astype(np.int64)
+    years = np.arange(start.min() - 1, end.max() + 2)
+    rates = store["NUMERIC"][column][rows] / store["NUMERIC"]["Duration"][rows].astype(np.float64)
+    if groups is None:
+        groups = np.zeros(len(rows), dtype = np.int64)
+    differences = np.zeros((size, len(years) + 1))
+    np.add.at(differences, (groups, start - years[0]), rates)
+    np.add.at(differences, (groups, end - years[0] + 1), -rates)
+    return years, np.cumsum(np.cumsum(differences[:, :-1], axis = 1), axis = 1)
+
+#%%% CUBE
+
+def buildCube(store, rows = None):
+    if rows is None:
+        rows = np.arange(store["SIZE"])
+    keys = np.zeros(len(rows), dtype = np.int64)
+    for column in BREAKDOWN_COLUMNS:
+        keys = keys * len(store["CATEGORIES"][column]) + store["CODES"][column][rows]
+    _, first, cells = np.unique(keys, return_index = True, return_inverse = True)
+    size = len(first)
+    cube = {
+        "SIZE": size,
+        "CODES": {column: store["CODES"][column][rows[first]] for column in BREAKDOWN_COLUMNS},
+        "COUNT": np.bincount(cells, minlength = size),
+        "LOCATED": np.bincount(cells, weights = store["LOCATED"][rows], minlength = size).astype(np.int64),
+        "CELLS": None,
+        "NUMERIC": {column: np.bincount(cells, weights = store["NUMERIC"][column][rows], minlength = size).astype(np.int64 if np.issubdtype(NUMERIC_COLUMNS[column], np.integer) else np.float64) for column in CONTINUOUS_COLUMNS},
+        "SUBAREAS": subareaTotals(store, rows, cells, size),
+        "START": np.full(size, np.iinfo(np.int64).max),
+        "END": np.full(size, np.iinfo(np.int64).min),
+        "PATHWAYS": {column: pathwaySeries(store, rows, column, cells, size) for column in PATHWAY_COLUMNS}
+        }
+    np.minimum.at(cube["START"], cells, store["NUMERIC"]["Start Year"][rows])
+    np.maximum.at(cube["END"], cells, store["NUMERIC"]["End Year"][rows])
+    return cube
+
+def cubeCells(cube, store, selections):
+    selected = np.ones(cube["SIZE"], dtype = bool)
+    for column in selections:
+        selected &= np.isin(store["CATEGORIES"][column], selections[column])[cube["CODES"][column]]
+    return np.flatnonzero(selected)
+
+def sliceCube(cube, cells):
+    return {
+        "SIZE": len(cells),
+        "CODES": {column: cube["CODES"][column][cells] for column in cube["CODES"]},
+        "COUNT": cube["COUNT"][cells],
+        "LOCATED": cube["LOCATED"][cells],
+        "CELLS": cells,
+        "NUMERIC": {column: cube["NUMERIC"][column][cells] for column in cube["NUMERIC"]},
+        "SUBAREAS": cube["SUBAREAS"][cells],
+        "START": cube["START"][cells],
+        "END": cube["END"][cells],
+        "PATHWAYS": {column: (cube["PATHWAYS"][column][0], cube["PATHWAYS"][column][1][cells]) for column in cube["PATHWAYS"]}
+        }
+
+def cubePathway(cube, column, groups = None, size = 1):
+    if cube["SIZE"] == 0:
+        return np.arange(0), np.zeros((size, 0))
+    years, values = cube["PATHWAYS"][column]
+    span = (years >= cube["START"].min() - 1) & (years <= cube["END"].max() + 1)
+    return years[span], groupTotals(values[:, span], groups, size)
+
+def alignPathway(years, values, target):
+    if len(years) == 0:
+        return np.zeros((len(values), len(target)))
+    return np.where(target < years[0], 0, values[:, np.clip(target - years[0], 0, len(years) - 1)])
+
+def mergeCells(parts, cells, inverse, size, field):
+    values = np.concatenate([sign * field(part)[rows] for (part, _, sign), rows in zip(parts, cells)])
+    totals = np.zeros((size, *values.shape[1:]), dtype = values.dtype)
+    np.add.at(totals, inverse, values)
+    return totals
+
+def updateCube(cube, previous, store, sources):
+    kept = sources[sources >= 0]
+    parts = [
+        (cube, previous, 1),
+        (buildCube(previous, np.setdiff1d(np.arange(previous["SIZE"]), kept)), previous, -1),
+        (buildCube(store, np.flatnonzero(sources < 0)), store, 1)
+        ]
+    keys = []
+    cells = []
+    for part, source, sign in parts:
+        partKeys = np.zeros(part["SIZE"], dtype = np.int64)
+        valid = np.ones(part["SIZE"], dtype = bool)
+        for column in BREAKDOWN_COLUMNS:
+            lookup = {value: i for i, value in enumerate(store["CATEGORIES"][column])}
+            codes = np.array([lookup.get(value, -1) for value in source["CATEGORIES"][column]], dtype = np.int64)[part["CODES"][column]]
+            valid &= codes >= 0
+            partKeys = partKeys * len(store["CATEGORIES"][column]) + codes
+        keys.append(partKeys[valid])
+        cells.append(np.flatnonzero(valid))
+    unique, inverse = np.unique(np.concatenate(keys), return_inverse = True)
+    merge = lambda field: mergeCells(parts, cells, inverse, len(unique), field)
+    counts = merge(lambda part: part["COUNT"])
+    present = np.flatnonzero(counts > 0)
+    codes = {}
+    remainder = unique[present]
+    for column in reversed(list(BREAKDOWN_COLUMNS)):
+        remainder, codes[column] = np.divmod(remainder, len(store["CATEGORIES"][column]))
+    years = np.arange(store["NUMERIC"]["Start Year"].min() - 1, store["NUMERIC"]["End Year"].max() + 2, dtype = np.int64) if store["SIZE"] > 0 else np.arange(0)
+    updated = {
+        "SIZE": len(present),
+        "CODES": {column: codes[column].astype(np.int16) for column in BREAKDOWN_COLUMNS},
+        "COUNT": counts[present],
+        "LOCATED": merge(lambda part: part["LOCATED"])[present],
+        "CELLS": None,
+        "NUMERIC": {column: merge(lambda part: part["NUMERIC"][column])[present] for column in CONTINUOUS_COLUMNS},
+        "SUBAREAS": merge(lambda part: part["SUBAREAS"])[present],
+        "START": np.full(len(present), np.iinfo(np.int64).max),
+        "END": np.full(len(present), np.iinfo(np.int64).min),
+        "PATHWAYS": {column: (years, merge(lambda part: alignPathway(*part["PATHWAYS"][column], years))[present]) for column in PATHWAY_COLUMNS}
+        }
+    rowKeys = np.zeros(store["SIZE"], dtype = np.int64)
+    for column in BREAKDOWN_COLUMNS:
+        rowKeys = rowKeys * len(store["CATEGORIES"][column]) + store["CODES"][column]
+    rowCells = np.searchsorted(unique[present], rowKeys)
+    np.minimum.at(updated["START"], rowCells, store["NUMERIC"]["Start Year"])
+    np.maximum.at(updated["END"], rowCells, store["NUMERIC"]["End Year"])
+    return updated
+
+#%%% SUMMARY
+
+def buildSummary(store, cube, rows, ranks):
+    summary = {
+        "TOTALS": {"COUNT": int(cube["COUNT"].sum()), **{column: cube["NUMERIC"][column].sum() for column in cube["NUMERIC"]}},
+        "RANKS": ranks,
+        "QUANTILES": {}
+        }
+    for column in CONTINUOUS_COLUMNS:
+        summary["QUANTILES"][column] = np.quantile(store["NUMERIC"][column][rows].astype(np.float64), SUMMARY_QUANTILES) if len(rows) > 0 else np.full(len(SUMMARY_QUANTILES), np.nan)
+    summary["MIN"] = {column: summary["QUANTILES"][column][0] for column in CONTINUOUS_COLUMNS}
+    summary["MAX"] = {column: summary["QUANTILES"][column][-1] for column in CONTINUOUS_COLUMNS}
+    return summary
+
+def summaryQuantile(summary, column, quantile):
+    return summary["QUANTILES"][column][SUMMARY_QUANTILES.index(quantile)]
+
+#%%% RANKS
+
+def rankWeights(cube):
+    return np.column_stack([cube["COUNT"], cube["LOCATED"], cube["SUBAREAS"].sum(axis = 1), *[cube["NUMERIC"][column] for column in CONTINUOUS_COLUMNS]]).astype(np.float64)
+
+def rankTotals(store, cube, weights, cells = None):
+    if cells is None:
+        cells = np.arange(cube["SIZE"])
+    totals = {}
+    for breakdown in BREAKDOWN_COLUMNS:
+        totals[breakdown] = np.zeros((len(store["CATEGORIES"][breakdown]), len(RANK_METRICS)))
+        np.add.at(totals[breakdown], cube["CODES"][breakdown][cells], weights[cells])
+    return totals
+
+def updateRankTotals(store, cube, weights, totals, previous, cells):
+    added = np.setdiff1d(cells, previous, assume_unique = True)
+    removed = np.setdiff1d(previous, cells, assume_unique = True)
+    if len(added) + len(removed) >= len(cells):
+        return rankTotals(store, cube, weights, cells)
+    additions = rankTotals(store, cube, weights, added)
+    removals = rankTotals(store, cube, weights, removed)
+    return {breakdown: totals[breakdown] + additions[breakdown] - removals[breakdown] for breakdown in totals}
+
+def rankBreakdown(store, breakdown, totals, metric = "COUNT", present = "COUNT", truncate = 5):
+    codes = np.flatnonzero(totals[:, RANK_METRICS.index(present)] > 0.5)
+    codes = codes[np.lexsort((codes, -np.round(totals[codes, RANK_METRICS.index(metric)], 6)))]
+    order = [store["CATEGORIES"][breakdown][code] for code in codes[0:truncate]]
+    groups = np.full(len(totals), truncate if len(codes) > truncate else -1)
+    groups[codes[0:truncate]] = np.arange(len(order))
+    if len(codes) > truncate:
         order.append("Other")
-    return df, order
+    return order, groups
 
-#%% INPUTS
+#%%% TABLE
+
+def tableKey(store, column):
+    if column in store["CODES"]:
+        return np.unique(np.array(store["CATEGORIES"][column], dtype = str), return_inverse = True)[1][store["CODES"][column]].astype(np.float64)
+    if column in store["TEXT"]:
+        return np.unique(np.char.lower(store["TEXT"][column].astype(str)), return_inverse = True)[1].astype(np.float64)
+    missing = store["MISSING"][column] | (store["NUMERIC"]["Start Year"] == 2025 if column in ["Start Year", "End Year"] else False)
+    return np.where(missing, np.nan, store["NUMERIC"][column].astype(np.float64))
+
+def buildTableIndex(store):
+    index = {"SEARCH": np.char.lower(store["TEXT"]["Name"].astype(str)), "ASCENDING": {}, "DESCENDING": {}}
+    for column in ["Name", *BREAKDOWN_COLUMNS, *store["NUMERIC"]]:
+        key = tableKey(store, column)
+        index["ASCENDING"][column] = np.argsort(key, kind = "stable")
+        index["DESCENDING"][column] = np.argsort(-key, kind = "stable")
+    return index
+
+def updateTableIndex(index, previous, store, sources):
+    targets = storeTargets(sources, previous["SIZE"])
+    kept = np.flatnonzero(sources >= 0)
+    added = np.flatnonzero(sources < 0)
+    lowered = np.char.lower(store["TEXT"]["Name"][added].astype(str))
+    search = np.empty(store["SIZE"], dtype = np.result_type(index["SEARCH"].dtype, lowered.dtype))
+    search[kept] = index["SEARCH"][sources[kept]]
+    search[added] = lowered
+    updated = {"SEARCH": search, "ASCENDING": {}, "DESCENDING": {}}
+    for column in ["Name", *BREAKDOWN_COLUMNS, *store["NUMERIC"]]:
+        if column == "Name":
+            ascending = updateOrder(index["ASCENDING"][column], search, targets, added)
+            distinct = np.ones(len(ascending), dtype = bool)
+            distinct[1:] = search[ascending][1:] != search[ascending][:-1]
+            key = np.empty(store["SIZE"])
+            key[ascending] = np.cumsum(distinct)
+        else:
+            key = tableKey(store, column)
+            ascending = updateOrder(index["ASCENDING"][column], key, targets, added)
+        updated["ASCENDING"][column] = ascending
+        updated["DESCENDING"][column] = updateOrder(index["DESCENDING"][column], -key, targets, added)
+    return updated
+
+def tableRows(index, store, rows, search = "", sort = None):
+    if search.strip() != "":
+        rows = rows[np.char.find(index["SEARCH"][rows], search.strip().lower()) >= 0]
+    if sort is None:
+        return rows
+    selected = np.zeros(store["SIZE"], dtype = bool)
+    selected[rows] = True
+    order = index[sort["DIRECTION"]][sort["COLUMN"]]
+    return order[selected[order]]
+
+def tableValues(store, column, rows):
+    values = np.asarray(storeColumn(store, column, rows))
+    if column in ["Start Year", "End Year"]:
+        return np.where(store["NUMERIC"]["Start Year"][rows] == 2025, "", values.astype(str))
+    if np.issubdtype(values.dtype, np.floating):
+        values = np.round(values.astype(np.float64), 2)
+        whole = np.nan_to_num(values) % 1 == 0
+        return np.where(np.isnan(values), "", np.where(whole, np.nan_to_num(values).astype(np.int64).astype(str), values.astype(str)))
+    return values.astype(str)
+
+#%%% DISTRIBUTIONS
+
+def kernelBandwidth(values):
+    quartiles = np.quantile(values, [0.25, 0.75])
+    spread = min(np.std(values), (quartiles[1] - quartiles[0]) / 1.349)
+    if spread <= 0:
+        spread = np.std(values)
+    return 1.059 * spread * len(values) ** -0.2
+
+def kernelDensity(values, grid, bandwidth):
+    edges = np.linspace(grid[0], grid[-1], DISTRIBUTION_BINS + 1)
+    counts = np.histogram(values, edges)[0]
+    centres = (edges[:-1] + edges[1:]) / 2
+    return np.exp(-0.5 * ((grid[:, None] - centres[None, :]) / bandwidth) ** 2) @ counts
+
+def samplePositions(length, count):
+    return np.unique(np.linspace(0, length - 1, min(length, count)).round().astype(np.int64))
+
+def distributionShapes(values, groups, size):
+    shapes = []
+    for group in range(0, size):
+        rows = np.flatnonzero(groups == group)
+        quartiles = np.quantile(values[rows], [0.25, 0.5, 0.75])
+        grid = np.linspace(values[rows].min(), values[rows].max(), DISTRIBUTION_GRID)
+        bandwidth = kernelBandwidth(values[rows])
+        density = kernelDensity(values[rows], grid, bandwidth) if bandwidth > 0 and grid[-1] > grid[0] else np.ones(len(grid))
+        if len(rows) > DISTRIBUTION_POINT_LIMIT:
+            fence = 1.5 * (quartiles[2] - quartiles[0])
+            outlying = (values[rows] < quartiles[0] - fence) | (values[rows] > quartiles[2] + fence)
+            outliers = rows[outlying][np.argsort(values[rows[outlying]], kind = "stable")]
+            outliers = outliers[samplePositions(len(outliers), DISTRIBUTION_POINT_LIMIT // 2)]
+            inliers = rows[~outlying][np.argsort(values[rows[~outlying]], kind = "stable")]
+            inliers = inliers[samplePositions(len(inliers), DISTRIBUTION_POINT_LIMIT - len(outliers))]
+            rows = np.sort(np.concatenate([outliers, inliers]))
+        shapes.append({"GRID": grid, "DENSITY": density / density.max(), "QUARTILES": quartiles, "POINTS": rows})
+    return shapes
+
+#%%% PROJECTS
+
+def projectParagraphs(values):
+    paragraph1 = [ui.tags.b(values["Name"]), " is a peatland restoration project in ", values["Country"], " with ", ui.tags.b(values["Developer"]), " as the project developer. "]
+    if values["Project Status"] == "Under Development":
+        paragraph1 = paragraph1 + ["The project is under development and the project plan has not yet been validated "]
+        if values["Validator"] == "N/A":
+            paragraph1 = paragraph1 + ["or a validator selected."]
+        else:
+            paragraph1 = paragraph1 + ["but ", ui.tags.b(values["Validator"]), " has been selected as the validator."]
+    elif values["Project Status"] == "Validated":
+        paragraph1 = paragraph1 + ["The project plan has been validated by ", ui.tags.b(values["Validator"]), " "]
+        if values["PIU Status"] == "Unissued":
+            paragraph1 = paragraph1 + ["but restoration is still to be validated and PIUs are not yet issued."]
+        elif values["PIU Status"] == "Issued":
+            paragraph1 = paragraph1 + ["and PIUs have been issued ahead of restoration validation which is still to occur."]
+        else:
+            raise ValueError("Unexpected 'PIU Status' value.")
+    elif values["Project Status"] == "Restoration Validated":
+        paragraph1 = paragraph1 + ["Restoration has been completed and validated by ", ui.tags.b(values["Validator"]), " "]
+        if values["PIU Status"] == "Unissued":
+            paragraph1 = paragraph1 + [" but PIUs are yet to be issued."]
+        elif values["PIU Status"] == "Issued":
+            paragraph1 = paragraph1 + [" and PIUs have been issued."]
+        else:
+            raise ValueError("Unexpected 'PIU Status' value.")
+    else:
+        raise ValueError("Unexpected 'Project Status' value.")
+    paragraph2 = ["The project covers ", formatNumber(values["Area"]), " ha and is predicted to lead to ", formatNumber(values["Predicted Emission Reductions"]), " tCO₂e of emission reductions over ", values["Duration"], " years"]
+    if values["Start Year"] == 2025:
+        paragraph2 = paragraph2 + ["."]
+    else:
+        paragraph2 = paragraph2 + [", starting in ", values["Start Year"], "."]
+    if values["Predicted Emission Reductions"] != 0:
+        paragraph2 = paragraph2 + [" ", formatNumber(values["Predicted Claimable Emission Reductions"]) , " tCO₂e of this (", round(values["Predicted Claimable Emission Reductions"] / values["Predicted Emission Reductions"] * 100), "%) is claimable."]
+    return paragraph1, paragraph2
+
+def projectSubareas(store, name, areas):
+    types = store["SUBAREA_INDEX"]["Type"]
+    subtypes = store["SUBAREA_INDEX"]["Sub-type"]
+    typeNames, groups = np.unique(types, return_inverse = True)
+    typeAreas = groupTotals(areas, groups, len(typeNames))
+    percentages = areas / areas.sum() * 100
+    typePercentages = groupTotals(percentages, groups, len(typeNames))
+    top = np.argsort(-typePercentages, kind = "stable")[0]
+    selected = [i for i in np.argsort(-percentages, kind = "stable") if groups[i] == top and percentages[i] >= 10]
+    paragraph3 = "The site is "
+    if (typePercentages > 0).sum() == 1:
+        paragraph3 = paragraph3 + "fully "
+    elif round(typePercentages[top]) == 100:
+        paragraph3 = paragraph3 + "almost fully "
+    else:
+        paragraph3 = paragraph3 + str(round(typePercentages[top])) + "% "
+    paragraph3 = paragraph3 + typeNames[top].lower()
+    if len(selected) > 0:
+        paragraph3 = paragraph3 + ", "
+        if (len(selected) == 1) & (percentages[selected[0]] == typePercentages[top]):
+            paragraph3 = paragraph3 + " all of which is classed as '" + subtypes[selected[0]] + "'."
+        else:
+            paragraph3 = paragraph3 + "including "
+            if len(selected) > 1:
+                for i in selected[:-1]:
+                    paragraph3 = paragraph3 + formatNumber(areas[i]) + " ha classed as '" + subtypes[i] + "', "
+                paragraph3 = paragraph3 + " and "
+            paragraph3 = paragraph3 + formatNumber(areas[selected[-1]]) + " ha classed as '" + subtypes[selected[-1]] + "'."
+    else:
+        paragraph3 = paragraph3 + "."
+    return paragraph3, subareaTreemap(store, name, areas)
+
+def projectEntry(store, row):
+    values = storeRecord(store, row)
+    paragraph1, paragraph2 = projectParagraphs(values)
+    paragraph3, treemap = projectSubareas(store, values["Name"], store["SUBAREAS"][row].astype(np.float64))
+    return {
+        "ROW": row,
+        "VALUES": values,
+        "LOCATED": bool(store["LOCATED"][row]),
+        "PARAGRAPHS": [paragraph1, paragraph2, paragraph3],
+        "TREEMAP": treemap
+        }
+
+def buildProjectIndex(store):
+    order = np.argsort(store["ID"], kind = "stable")
+    return {"IDS": store["ID"][order], "ROWS": order}
+
+def updateProjectIndex(index, previous, store, sources):
+    order = updateOrder(index["ROWS"], store["ID"], storeTargets(sources, previous["SIZE"]), np.flatnonzero(sources < 0))
+    return {"IDS": store["ID"][order], "ROWS": order}
+
+def projectRow(index, id):
+    position = np.searchsorted(index["IDS"], id)
+    if position < len(index["IDS"]) and index["IDS"][position] == id:
+        return int(index["ROWS"][position])
+    return None
+
+#%%% SEARCH
+
+def searchKeys(text):
+    text = text.lower()
+    return [text[match.start():] for match in re.finditer("\\w+", text)]
+
+def searchEntries(store, rows):
+    entries = []
+    for row in rows:
+        entries += [(key, 0, row) for key in searchKeys(store["TEXT"]["Name"][row])[0:1]]
+        entries += [(key, 1, row) for key in searchKeys(store["TEXT"]["Name"][row])[1:]]
+        entries += [(key, 2, row) for key in searchKeys(store["CATEGORIES"]["Developer"][store["CODES"]["Developer"][row]])]
+        entries += [(str(store["ID"][row]), 3, row)]
+    return entries
+
+def searchIndex(entries):
+    entries.sort()
+    return {
+        "KEYS": [entry[0] for entry in entries],
+        "RANKS": np.array([entry[1] for entry in entries], dtype = np.int8),
+        "ROWS": np.array([entry[2] for entry in entries], dtype = np.int64)
+        }
+
+def buildSearchIndex(store):
+    return searchIndex(searchEntries(store, range(0, store["SIZE"])))
+
+def updateSearchIndex(index, previous, store, sources):
+    rows = storeTargets(sources, previous["SIZE"])[index["ROWS"]]
+    keys = list(itertools.compress(index["KEYS"], (rows >= 0).tolist()))
+    ranks = index["RANKS"][rows >= 0]
+    rows = rows[rows >= 0]
+    order = ranks.astype(np.int64) * (store["SIZE"] + 1) + rows
+    entries = sorted(searchEntries(store, np.flatnonzero(sources < 0).tolist()))
+    positions = []
+    for key, rank, row in entries:
+        lower = bisect.bisect_left(keys, key)
+        upper = bisect.bisect_right(keys, key, lower)
+        positions.append(lower + int(np.searchsorted(order[lower:upper], rank * (store["SIZE"] + 1) + row)))
+    merged = []
+    start = 0
+    for position, entry in zip(positions, entries):
+        merged += keys[start:position]
+        merged.append(entry[0])
+        start = position
+    return {
+        "KEYS": merged + keys[start:],
+        "RANKS": np.insert(ranks, positions, [entry[1] for entry in entries]).astype(np.int8),
+        "ROWS": np.insert(rows, positions, [entry[2] for entry in entries]).astype(np.int64)
+        }
+
+def searchRows(index, query, limit = 10):
+    query = query.strip().lower()
+    if query == "":
+        return np.arange(0)
+    start = bisect.bisect_left(index["KEYS"], query)
+    end = bisect.bisect_left(index["KEYS"], query + "\U0010ffff", start)
+    rows = index["ROWS"][start:end][np.argsort(index["RANKS"][start:end], kind = "stable")]
+    return rows[np.sort(np.unique(rows, return_index = True)[1])][0:limit]
+
+#%%% MAPS
+
+def mercatorCells(latitude, longitude):
+    latitude = np.radians(np.clip(np.nan_to_num(np.asarray(latitude, dtype = np.float64)), -85, 85))
+    longitude = np.nan_to_num(np.asarray(longitude, dtype = np.float64))
+    x = (longitude + 180) / 360
+    y = (1 - np.log(np.tan(np.pi / 4 + latitude / 2)) / np.pi) / 2
+    return np.clip(x * 2**MAP_INDEX_LEVELS, 0, 2**MAP_INDEX_LEVELS - 1).astype(np.int64), np.clip(y * 2**MAP_INDEX_LEVELS, 0, 2**MAP_INDEX_LEVELS - 1).astype(np.int64)
+
+def regionCells(x, y):
+    return (x.astype(np.int64) >> (MAP_INDEX_LEVELS - MAP_REGION_LEVELS)) << MAP_REGION_LEVELS | y.astype(np.int64) >> (MAP_INDEX_LEVELS - MAP_REGION_LEVELS)
+
+def buildMapIndex(store):
+    x, y = mercatorCells(store["NUMERIC"]["Latitude"], store["NUMERIC"]["Longitude"])
+    rows = np.flatnonzero(store["LOCATED"])
+    cells = regionCells(x[rows], y[rows])
+    order = np.argsort(cells, kind = "stable")
+    return {"X": x.astype(np.uint32), "Y": y.astype(np.uint32), "CELLS": cells[order], "ROWS": rows[order]}
+
+def updateMapIndex(index, previous, store, sources):
+    kept = np.flatnonzero(sources >= 0)
+    added = np.flatnonzero(sources < 0)
+    x, y = mercatorCells(store["NUMERIC"]["Latitude"][added], store["NUMERIC"]["Longitude"][added])
+    updated = {"X": np.zeros(store["SIZE"], dtype = np.uint32), "Y": np.zeros(store["SIZE"], dtype = np.uint32)}
+    updated["X"][kept], updated["Y"][kept] = index["X"][sources[kept]], index["Y"][sources[kept]]
+    updated["X"][added], updated["Y"][added] = x, y
+    cells = regionCells(updated["X"], updated["Y"])
+    updated["ROWS"] = updateOrder(index["ROWS"], cells, storeTargets(sources, previous["SIZE"]), added[store["LOCATED"][added]])
+    updated["CELLS"] = cells[updated["ROWS"]]
+    return updated
+
+def regionCandidates(index, x, y):
+    shift = MAP_INDEX_LEVELS - MAP_REGION_LEVELS
+    columns = np.arange(x.min() >> shift, (x.max() >> shift) + 1)
+    lower = np.searchsorted(index["CELLS"], columns << MAP_REGION_LEVELS | y.min() >> shift)
+    upper = np.searchsorted(index["CELLS"], columns << MAP_REGION_LEVELS | y.max() >> shift, side = "right")
+    counts = upper - lower
+    return index["ROWS"][np.arange(counts.sum()) + np.repeat(lower - np.cumsum(counts) + counts, counts)]
+
+def insidePolygon(x, y, polygonX, polygonY):
+    inside = np.zeros(len(x), dtype = bool)
+    for x0, y0, x1, y1 in zip(polygonX, polygonY, np.roll(polygonX, 1), np.roll(polygonY, 1)):
+        if y0 != y1:
+            inside ^= ((y0 > y) != (y1 > y)) & (x < (x1 - x0) * (y - y0) / (y1 - y0) + x0)
+    return inside
+
+def regionBitmap(index, store, region):
+    points = np.asarray(region["range"] if "range" in region else region["lasso"], dtype = np.float64)
+    x, y = mercatorCells(points[:, 1], points[:, 0])
+    rows = regionCandidates(index, x, y)
+    if "range" in region:
+        rows = rows[(index["X"][rows] >= x.min()) & (index["X"][rows] <= x.max()) & (index["Y"][rows] >= y.min()) & (index["Y"][rows] <= y.max())]
+    else:
+        rows = rows[insidePolygon(index["X"][rows].astype(np.float64), index["Y"][rows].astype(np.float64), x, y)]
+    selected = np.zeros(store["SIZE"], dtype = bool)
+    selected[rows] = True
+    return np.packbits(selected)
+
+def mapMarkers(index, store, rows, viewport = None, groups = None):
+    if groups is None:
+        groups = np.zeros(len(rows), dtype = np.int64)
+    if len(rows) > MAP_MARKER_LIMIT and viewport is not None:
+        x, y = mercatorCells(viewport["latitude"], viewport["longitude"])
+        margin = (x[1] - x[0]) // 2, (y[0] - y[1]) // 2
+        visible = (index["X"][rows] >= x[0] - margin[0]) & (index["X"][rows] <= x[1] + margin[0]) & (index["Y"][rows] >= y[1] - margin[1]) & (index["Y"][rows] <= y[0] + margin[1])
+        rows, groups = rows[visible], groups[visible]
+    latitude = store["NUMERIC"]["Latitude"][rows].astype(np.float64)
+    longitude = store["NUMERIC"]["Longitude"][rows].astype(np.float64)
+    if len(rows) <= MAP_MARKER_LIMIT:
+        return {"ROWS": rows, "LATITUDE": latitude, "LONGITUDE": longitude, "COUNTS": np.ones(len(rows), dtype = np.int64), "GROUPS": groups}
+    level = min(int(MAP_VIEW["zoom"] if viewport is None else viewport["zoom"]) + MAP_CLUSTER_LEVELS, MAP_INDEX_LEVELS)
+    cells = (index["X"][rows].astype(np.int64) >> (MAP_INDEX_LEVELS - level)) << level | index["Y"][rows].astype(np.int64) >> (MAP_INDEX_LEVELS - level)
+    _, first, inverse, counts = np.unique(cells * (groups.max() + 1) + groups, return_index = True, return_inverse = True, return_counts = True)
+    return {
+        "ROWS": np.where(counts > 1, -1, rows[first]),
+        "LATITUDE": np.bincount(inverse, weights = latitude) / counts,
+        "LONGITUDE": np.bincount(inverse, weights = longitude) / counts,
+        "COUNTS": counts,
+        "GROUPS": groups[first]
+        }
+
+def mapMarkerText(store, markers):
+    return np.where(markers["ROWS"] >= 0, store["TEXT"]["Name"][markers["ROWS"]], markers["COUNTS"].astype(str).astype(object) + " projects")
+
+def mapMarkerSizes(markers):
+    return np.where(markers["COUNTS"] > 1, 6 + 4 * np.log2(markers["COUNTS"]), 6) if (markers["COUNTS"] > 1).any() else 6
+
+#%%% ARTIFACT
+
+def readStore(source):
+    pd = importlib.import_module("pandas")
+    return buildStore(pd.read_csv(source, keep_default_na = False))
+
+def indexTables(tables):
+    cube = buildCube(tables["STORE"])
+    return {
+        **tables,
+        "FILTER_INDEX": buildFilterIndex(tables["STORE"]),
+        "MAP_INDEX": buildMapIndex(tables["STORE"]),
+        "CUBE": cube,
+        "RANK_WEIGHTS": rankWeights(cube),
+        "PROJECT_INDEX": buildProjectIndex(tables["STORE"])
+        }
+
+def buildTables(store):
+    return indexTables({"STORE": store, "TABLE_INDEX": buildTableIndex(store), "SEARCH_INDEX": buildSearchIndex(store)})
+
+def updateTables(tables, store, sources):
+    kept = sources[sources >= 0]
+    if store["SUBAREA_COLUMNS"] != tables["STORE"]["SUBAREA_COLUMNS"] or (np.diff(kept) <= 0).any():
+        return buildTables(store)
+    cube = updateCube(tables["CUBE"], tables["STORE"], store, sources)
+    return {
+        "STORE": store,
+        "FILTER_INDEX": updateFilterIndex(tables["FILTER_INDEX"], tables["STORE"], store, sources),
+        "TABLE_INDEX": updateTableIndex(tables["TABLE_INDEX"], tables["STORE"], store, sources),
+        "SEARCH_INDEX": updateSearchIndex(tables["SEARCH_INDEX"], tables["STORE"], store, sources),
+        "MAP_INDEX": updateMapIndex(tables["MAP_INDEX"], tables["STORE"], store, sources),
+        "CUBE": cube,
+        "RANK_WEIGHTS": rankWeights(cube),
+        "PROJECT_INDEX": updateProjectIndex(tables["PROJECT_INDEX"], tables["STORE"], store, sources)
+        }
+
+def tablesDigest(source):
+    return hashlib.sha1(source.read_bytes() + pathlib.Path(__file__).read_bytes()).hexdigest()
+
+def packTables(value, arrays):
+    if isinstance(value, np.ndarray):
+        key = str(len(arrays))
+        arrays[key] = value.astype(str) if value.dtype == object else value
+        return {"ARRAY": key, "OBJECT": value.dtype == object}
+    if isinstance(value, dict):
+        return {"DICT": [[key, packTables(item, arrays)] for key, item in value.items()]}
+    if isinstance(value, (list, tuple)):
+        return {"LIST" if isinstance(value, list) else "TUPLE": [packTables(item, arrays) for item in value]}
+    return value.item() if isinstance(value, np.generic) else value
+
+def unpackTables(value, arrays):
+    if not isinstance(value, dict):
+        return value
+    if "ARRAY" in value:
+        return arrays[value["ARRAY"]].astype(object) if value["OBJECT"] else arrays[value["ARRAY"]]
+    if "DICT" in value:
+        return {key: unpackTables(item, arrays) for key, item in value["DICT"]}
+    if "TUPLE" in value:
+        return tuple(unpackTables(item, arrays) for item in value["TUPLE"])
+    return [unpackTables(item, arrays) for item in value["LIST"]]
+
+def saveTables(tables, stamp, artifact):
+    arrays = {}
+    metadata = {"STAMP": stamp, "TABLES": packTables({key: tables[key] for key in ["STORE", "TABLE_INDEX", "SEARCH_INDEX"]}, arrays)}
+    np.savez_compressed(artifact, METADATA = np.array(json.dumps(metadata)), **arrays)
+
+def loadTables(stamp, artifact):
+    if not artifact.exists():
+        return None
+    with np.load(artifact) as arrays:
+        metadata = json.loads(arrays["METADATA"].item())
+        if stamp is not None and metadata["STAMP"] != stamp:
+            return None
+        return indexTables(unpackTables(metadata["TABLES"], arrays))
+
+#%%% HISTORY
+
+def buildHistory(deltas):
+    store = concatStores([delta["STORE"] for delta in deltas])
+    dates = np.array([delta["DATE"] for delta in deltas] + [HISTORY_OPEN], dtype = "datetime64[D]")
+    sequence = np.repeat(np.arange(len(deltas)), [delta["STORE"]["SIZE"] for delta in deltas])
+    ids = np.concatenate([store["ID"], *[delta["REMOVED"] for delta in deltas]])
+    events = np.concatenate([sequence, np.repeat(np.arange(len(deltas)), [len(delta["REMOVED"]) for delta in deltas])])
+    order = np.lexsort((events, ids))
+    following = np.full(len(ids), len(deltas))
+    same = ids[order][1:] == ids[order][:-1]
+    following[order[:-1][same]] = events[order][1:][same]
+    return {
+        "STORE": store,
+        "FROM": dates[sequence],
+        "TO": dates[following[:store["SIZE"]]],
+        "DATES": np.unique(dates[:-1]),
+        "FILTER_INDEX": buildFilterIndex(store),
+        "MAP_INDEX": buildMapIndex(store),
+        "DELTAS": deltas
+        }
+
+def historyBitmap(history, day):
+    return np.packbits((history["FROM"] <= day) & (day < history["TO"]))
+
+def historyRows(history, day, selections, region = None):
+    bitmap = historyBitmap(history, day)
+    for column in selections:
+        bitmap = bitmap & selectionBitmap(history["FILTER_INDEX"], column, selections[column])
+    if region is not None:
+        bitmap = bitmap & regionBitmap(history["MAP_INDEX"], history["STORE"], region)
+    return filterRows(bitmap, history["STORE"]["SIZE"])
 
-DATA = pd.read_csv(pathlib.Path(__file__).parent / "data.csv", keep_default_na = False)
+def historyChanges(history, start, end):
+    before = historyRows(history, start, {})
+    after = historyRows(history, end, {})
+    common, i, j = np.intersect1d(history["STORE"]["ID"][before], history["STORE"]["ID"][after], return_indices = True)
+    changed = np.flatnonzero(storeSources(storeRows(history["STORE"], before[i]), storeRows(history["STORE"], after[j])) < 0)
+    changes = {
+        "ADDED": np.setdiff1d(history["STORE"]["ID"][after], common),
+        "REMOVED": np.setdiff1d(history["STORE"]["ID"][before], common),
+        "CHANGED": common[changed],
+        "COLUMNS": {}
+        }
+    for column in [*BREAKDOWN_COLUMNS, *CONTINUOUS_COLUMNS]:
+        count = int((storeColumn(history["STORE"], column, before[i][changed]) != storeColumn(history["STORE"], column, after[j][changed])).sum())
+        if count > 0:
+            changes["COLUMNS"][column] = count
+    return changes
+
+def snapshotDelta(history, store, extracted):
+    date = extracted
+    if history is None:
+        rows = np.arange(store["SIZE"])
+        removed = np.arange(0)
+    else:
+        latest = storeRows(history["STORE"], np.flatnonzero(history["TO"] == HISTORY_OPEN))
+        rows = np.flatnonzero(storeSources(latest, store) < 0)
+        removed = np.setdiff1d(latest["ID"], store["ID"])
+        date = max(date, history["DATES"][-1].item())
+    sequence = 0 if history is None else len(history["DELTAS"])
+    return {"DATE": date.isoformat(), "STAMP": date.isoformat() + "-" + str(sequence).zfill(4), "STORE": storeRows(store, rows), "REMOVED": removed}
+
+def saveHistory(delta, directory):
+    arrays = {}
+    metadata = packTables(delta, arrays)
+    directory.mkdir(exist_ok = True)
+    np.savez_compressed(directory / (delta["STAMP"] + ".npz"), METADATA = np.array(json.dumps(metadata)), **arrays)
+
+def historyDates(directory, extracted):
+    return np.unique(np.array([path.stem[0:10] for path in directory.glob("*.npz")] + [extracted.isoformat()], dtype = "datetime64[D]"))
+
+def loadHistory(directory):
+    deltas = []
+    for path in sorted(directory.glob("*.npz")):
+        with np.load(path) as arrays:
+            deltas.append(unpackTables(json.loads(arrays["METADATA"].item()), arrays))
+    return buildHistory(deltas) if len(deltas) > 0 else None
+
+def updateHistory(history, store, extracted):
+    delta = snapshotDelta(history, store, extracted)
+    if history is not None and delta["STORE"]["SIZE"] + len(delta["REMOVED"]) == 0:
+        return history
+    return buildHistory(([] if history is None else history["DELTAS"]) + [delta])
+
+def recordHistory(history, directory):
+    try:
+        for delta in history["DELTAS"]:
+            if not (directory / (delta["STAMP"] + ".npz")).exists():
+                saveHistory(delta, directory)
+    except OSError as error:
+        warnings.warn(f"Registry history could not be saved: {error}")
+    return history
+
+#%%% REGISTRY
+
+def breakdownPalette(choices, extra = None):
+    if extra is not None:
+        choices = {column: choices[column] + [value for value in extra[column] if value not in choices[column]] for column in BREAKDOWN_COLUMNS}
+    return {column: {insert(choices[column], 5, "Other")[i]: co.DEFAULT_PLOTLY_COLORS[i % len(co.DEFAULT_PLOTLY_COLORS)] for i in range(0, len(choices[column]) + 1)} for column in list(BREAKDOWN_COLUMNS.keys())}
+
+def registrySnapshot(tables, version, stamp, extracted):
+    return {**tables, "VERSION": version, "STAMP": stamp, "EXTRACTED": extracted, "PALETTE": breakdownPalette(tables["STORE"]["CATEGORIES"])}
+
+def registryExtracted(metadata):
+    return np.datetime64(json.loads(metadata.read_text())["EXTRACTED"], "D").item()
+
+def registryStamp(source, metadata):
+    return {"DIGEST": tablesDigest(source), "METADATA": json.loads(metadata.read_text())}
+
+def registryModified(paths):
+    return [(path.stat().st_mtime_ns, path.stat().st_size) if path.exists() else None for path in paths]
+
+def loadRegistry(source, metadata, artifact):
+    stamp = registryStamp(source, metadata) if source.exists() else None
+    return registrySnapshot(loadTables(stamp, artifact) or buildTables(readStore(source)), 0, stamp, registryExtracted(metadata))
+
+def initialHistory(registry):
+    return updateHistory(loadHistory(HISTORY_SOURCE), registry["STORE"], registry["EXTRACTED"])
+
+def registryHistory():
+    global HISTORY
+    if HISTORY is None:
+        HISTORY = initialHistory(REGISTRY)
+    return HISTORY
+
+def reloadTables(registry, history):
+    try:
+        stamp = registryStamp(DATA_SOURCE, DATA_METADATA)
+        if stamp == registry["STAMP"]:
+            return None
+        extracted = registryExtracted(DATA_METADATA)
+        store = readStore(DATA_SOURCE)
+        tables = updateTables(registry, store, storeSources(registry["STORE"], store))
+        history = recordHistory(updateHistory(initialHistory(registry) if history is None else history, store, extracted), HISTORY_SOURCE)
+    except (OSError, KeyError, ValueError) as error:
+        warnings.warn(f"Registry data could not be reloaded: {error}")
+        return None
+    return {"TABLES": tables, "STAMP": stamp, "EXTRACTED": extracted, "HISTORY": history}
+
+def commitRegistry(reloaded):
+    global REGISTRY, HISTORY, HISTORY_DATES
+    REGISTRY = registrySnapshot(reloaded["TABLES"], REGISTRY["VERSION"] + 1, reloaded["STAMP"], reloaded["EXTRACTED"])
+    HISTORY = reloaded["HISTORY"]
+    HISTORY_DATES = HISTORY["DATES"]
+    cacheClear(AGGREGATE_CACHE)
+    cacheClear(MODAL_CACHE)
+    return REGISTRY
+
+def pollRegistry():
+    modified = registryModified([DATA_SOURCE, DATA_METADATA])
+    if REGISTRY_RELOAD["FUTURE"] is None and modified != REGISTRY_RELOAD["MODIFIED"] and DATA_SOURCE.exists():
+        REGISTRY_RELOAD["MODIFIED"] = modified
+        if CHART_EXECUTOR is None:
+            REGISTRY_RELOAD["FUTURE"] = concurrent.futures.Future()
+            REGISTRY_RELOAD["FUTURE"].set_result(reloadTables(REGISTRY, HISTORY))
+        else:
+            REGISTRY_RELOAD["FUTURE"] = CHART_EXECUTOR.submit(reloadTables, REGISTRY, HISTORY)
+    if REGISTRY_RELOAD["FUTURE"] is not None and REGISTRY_RELOAD["FUTURE"].done():
+        if REGISTRY_RELOAD["FUTURE"].result() is not None:
+            commitRegistry(REGISTRY_RELOAD["FUTURE"].result())
+        REGISTRY_RELOAD["FUTURE"] = None
+    return REGISTRY["VERSION"]
+
+#%% INPUTS
 
 BREAKDOWN_COLUMNS = {
     "Country": "country",
@@ -58,9 +1101,18 @@ BREAKDOWN_COLUMNS = {
     "Validator": "validator"
     }
 
-BREAKDOWN_CHOICES = {column: DATA[column].value_counts().index.to_list() for column in list(BREAKDOWN_COLUMNS.keys())}
+TEXT_COLUMNS = ["Name", "URL"]
 
-BREAKDOWN_COLOUR_PALETTE = {column: {insert(DATA[column].value_counts().index.to_list(), 5, "Other")[i]: co.DEFAULT_PLOTLY_COLORS[i % len(co.DEFAULT_PLOTLY_COLORS)] for i in range(0, len(BREAKDOWN_CHOICES[column]) + 1)} for column in list(BREAKDOWN_COLUMNS.keys())}
+NUMERIC_COLUMNS = {
+    "Start Year": np.int16,
+    "End Year": np.int16,
+    "Duration": np.int16,
+    "Area": np.float32,
+    "Predicted Emission Reductions": np.float32,
+    "Predicted Claimable Emission Reductions": np.float32,
+    "Latitude": np.float32,
+    "Longitude": np.float32
+    }
 
 CONTINUOUS_COLUMNS = {
     "Duration": {
@@ -88,6 +1140,55 @@ CONTINUOUS_COLUMNS = {
         }
     }
 
+PATHWAY_COLUMNS = ["Predicted Emission Reductions", "Predicted Claimable Emission Reductions"]
+
+MAP_VIEW = {
+    "center": {"lat": 56, "lon": -2.5},
+    "zoom": 4
+    }
+
+MAP_INDEX_LEVELS = 24
+
+MAP_REGION_LEVELS = 12
+
+MAP_CLUSTER_LEVELS = 3
+
+MAP_MARKER_LIMIT = 1000
+
+DATA_SOURCE = pathlib.Path(__file__).parent / "data.csv"
+
+DATA_ARTIFACT = pathlib.Path(__file__).parent / "data.npz"
+
+DATA_METADATA = pathlib.Path(__file__).parent / "data.json"
+
+REGISTRY = loadRegistry(DATA_SOURCE, DATA_METADATA, DATA_ARTIFACT)
+
+TABLE_PAGE_SIZE = 100
+
+FILTER_DEBOUNCE = 0.25
+
+DISTRIBUTION_GRID = 100
+
+DISTRIBUTION_BINS = 256
+
+DISTRIBUTION_POINT_LIMIT = 500
+
+CARBON_POINTS_WEBGL = 1000
+
+CARBON_POINTS_LIMIT = 10000
+
+CARBON_POINTS_BINS = 60
+
+BREAKDOWN_CHOICES = REGISTRY["STORE"]["CATEGORIES"]
+
+SUMMARY_QUANTILES = [0, 0.1, 0.25, 0.5, 0.75, 0.9, 1]
+
+RANK_METRICS = ["COUNT", "LOCATED", "Subarea Area", *CONTINUOUS_COLUMNS]
+
+AGGREGATE_CACHE = {"SIZE": 256, "LIMIT": 128 * 2**20, "ENTRIES": collections.OrderedDict(), "NBYTES": {}, "HITS": 0, "MISSES": 0}
+
+CHART_EXECUTOR = None if sys.platform == "emscripten" else concurrent.futures.ThreadPoolExecutor(max_workers = 4)
+
 AREA_COLOUR_PALETTE = {
     "Blanket Bog": {
         "": "rgba(31, 119, 180, 0.25)",
@@ -116,6 +1217,24 @@ AREA_COLOUR_PALETTE = {
         }
     }
 
+MODAL_CACHE = {"SIZE": 64, "LIMIT": 16 * 2**20, "ENTRIES": collections.OrderedDict(), "NBYTES": {}, "HITS": 0, "MISSES": 0}
+
+REGISTRY_POLL = 10
+
+REGISTRY_RELOAD = {"MODIFIED": registryModified([DATA_SOURCE, DATA_METADATA]), "FUTURE": None}
+
+HISTORY_SOURCE = pathlib.Path(__file__).parent / "history"
+
+HISTORY_OPEN = np.datetime64("9999-12-31")
+
+HISTORY = None
+
+HISTORY_DATES = historyDates(HISTORY_SOURCE, REGISTRY["EXTRACTED"])
+
+@reactive.poll(pollRegistry, interval_secs = REGISTRY_POLL)
+def registry():
+    return REGISTRY
+
 #%% MODULES
 
 #%%% FILTER
@@ -143,33 +1262,44 @@ def filter_ui(title):
         )
 
 @module.server
-def filter_server(input, output, session, name, filters, resetInput = None):
+def filter_server(input, output, session, name, facets, resetInput = None):
     
-    selection = reactive.value(BREAKDOWN_CHOICES[name])
+    known = reactive.value(BREAKDOWN_CHOICES[name])
+    selection = reactive.value(filterSelection(BREAKDOWN_CHOICES[name], REGISTRY["STORE"]["CATEGORIES"][name], BREAKDOWN_CHOICES[name]))
+    labels = reactive.value(None)
         
     @reactive.effect
     @reactive.event(input.filter)
     def updateSelection():
-        if sorted(input.filter()) != selection():
-            selection.set(sorted(input.filter()))
+        selected = filterSelection(input.filter(), registry()["STORE"]["CATEGORIES"][name], known())
+        if selected != selection():
+            selection.set(selected)
+        
+    @reactive.effect
+    @reactive.event(registry, ignore_init = True)
+    def updateChoices():
+        with reactive.isolate():
+            selection.set(filterSelection(selection(), registry()["STORE"]["CATEGORIES"][name], known()))
         
     @reactive.effect
     def updateLabels():
-        df = DATA.copy()
-        for column in filters:
-            if column != name:
-                df = df[df[column].isin(filters[column]())]
-        df = pd.merge(DATA.copy()[[name]].drop_duplicates(), df[name].value_counts().reset_index().rename(columns = {"index": name, "count": "Count"}), how = "left").sort_values(["Count", name], ascending = [False, True])
-        df["Count"] = df["Count"].fillna(0).astype(int)
+        choices = facets()["CHOICES"][name]
+        counts = facets()["COUNTS"][name]
         with reactive.isolate():
-            ui.update_checkbox_group("filter", choices = {row[name]: row[name] + " (" + str(row["Count"]) + ")" for i, row in df.iterrows()}, selected = selection())
+            if choices != known():
+                selection.set(filterSelection(selection(), choices, known()))
+                known.set(choices)
+                labels.set(None)
+            if counts != labels():
+                labels.set(counts)
+                ui.update_checkbox_group("filter", choices = {value: value + " (" + str(count) + ")" for value, count in sorted(zip(choices, counts), key = lambda item: (-item[1], item[0]))}, selected = selection())
     
     if len(BREAKDOWN_CHOICES[name]) > 5:
     
         @reactive.effect
         @reactive.event(input.selectAll)
         def selectAll():
-            ui.update_checkbox_group("filter", selected = BREAKDOWN_CHOICES[name])
+            ui.update_checkbox_group("filter", selected = registry()["STORE"]["CATEGORIES"][name])
             
         @reactive.effect
         @reactive.event(input.deselectAll)
@@ -181,7 +1311,7 @@ def filter_server(input, output, session, name, filters, resetInput = None):
         @reactive.effect
         @reactive.event(resetInput)
         def reset():
-            ui.update_checkbox_group("filter", selected = BREAKDOWN_CHOICES[name])
+            ui.update_checkbox_group("filter", selected = registry()["STORE"]["CATEGORIES"][name])
             
     return selection
 
@@ -199,19 +1329,19 @@ def valueBoxes_ui(highlight = None):
         )
 
 @module.server
-def valueBoxes_server(input, output, session, data):
+def valueBoxes_server(input, output, session, summary):
         
     @render.text
     def updateProjects():
-        return formatNumber(len(data()))
+        return formatNumber(summary()["TOTALS"]["COUNT"])
 
     @render.text
     def updateArea():
-        return formatNumber((data()["Area"].sum())) + " ha"
+        return formatNumber(summary()["TOTALS"]["Area"]) + " ha"
     
     @render.text
     def updateCarbon():
-        return formatNumber(data()["Predicted Emission Reductions"].sum()) + " tCO₂e"
+        return formatNumber(summary()["TOTALS"]["Predicted Emission Reductions"]) + " tCO₂e"
     
 #%%% INFO POPOVERS
 
@@ -244,7 +1374,7 @@ def infoCardHeader_ui(text, popover, variables = None):
             popover.append(ui.output_text(re.sub("[^\\w]", "_", outputs[i]), inline = True))
             popover.append(texts[i + 1])
         
-    buttons = ui.popover(icon_svg("circle-question", height = "14.4px", margin_right = ["0px" if variables is None else "0.2em"]), ui.p(*popover), "Data sourced from ", ui.a("UK Peatland Code Registry", href = "https://mer.markit.com/br-reg/public/index.jsp?entity=project&sort=project_name&dir=ASC&start=0&acronym=PCC&limit=15&additionalCertificationId=&categoryId=100000000000001&name=&standardId=100000000000157"), " in May 2024.")
+    buttons = ui.popover(icon_svg("circle-question", height = "14.4px", margin_right = ["0px" if variables is None else "0.2em"]), ui.p(*popover), "Data sourced from ", ui.a("UK Peatland Code Registry", href = "https://mer.markit.com/br-reg/public/index.jsp?entity=project&sort=project_name&dir=ASC&start=0&acronym=PCC&limit=15&additionalCertificationId=&categoryId=100000000000001&name=&standardId=100000000000157"), " in ", ui.output_text("updated", inline = True), ".")
     
     if variables is not None:
         buttons = ui.div(buttons, ui.popover(icon_svg("gear", height = "14.4px", margin_right = "0px"), ui.div(*[buildInput(re.sub("[^\\w]", "_", variable), ui.tags.b(variable), variables[variable]["Choices"], variables[variable]["Selected"]) for variable in variables])))
@@ -254,6 +1384,10 @@ def infoCardHeader_ui(text, popover, variables = None):
 @module.server
 def infoCardHeader_server(input, output, session, breakdownInput = None, variables = None):
     
+    @render.text
+    def updated():
+        return registry()["EXTRACTED"].strftime("%B %Y")
+    
     if breakdownInput is not None:
         @render.text
         def breakdown():
@@ -293,7 +1427,8 @@ userInterface = ui.page_navbar(
             valueBoxes_ui("valueBoxes_projects", 1),
             ui.card(
                 ui.card_header(infoCardHeader_ui("projectsTable_header", "Table", "Table of projects.", {"Columns": {"Choices": ["Start Year", "End Year"] + list(CONTINUOUS_COLUMNS.keys()), "Selected": ["Duration", "Area", "Predicted Emission Reductions"]}})),
-                ui.output_data_frame("projectsTable"),
+                ui.input_text("projectsTable_search", None, placeholder = "Search projects by name", width = "100%"),
+                ui.output_ui("projectsTable", fill = True, fillable = True),
                 full_screen = True),
             ui.card(
                 ui.card_header(infoCardHeader_ui("projectsMap_header", "Map", "Map of projects broken down by {breakdown}.")),
@@ -320,7 +1455,7 @@ userInterface = ui.page_navbar(
         ui.layout_columns(
             valueBoxes_ui("valueBoxes_carbon", 3),
             ui.card(
-                ui.card_header(infoCardHeader_ui("carbonPathway_header", "Pathway", "Cumulative {Y-axis} across projects' durations broken down by {breakdown}. Projects without start dates assumed to start in 2025.", {"Y-axis": {"Choices": ["Predicted Emission Reductions", "Predicted Claimable Emission Reductions"], "Selected": "Predicted Emission Reductions"}})),
+                ui.card_header(infoCardHeader_ui("carbonPathway_header", "Pathway", "Cumulative {Y-axis} across projects' durations broken down by {breakdown}. Projects without start dates assumed to start in 2025.", {"Y-axis": {"Choices": PATHWAY_COLUMNS, "Selected": "Predicted Emission Reductions"}})),
                 output_widget("carbonPathway"),
                 full_screen = True),
             ui.card(
@@ -333,19 +1468,28 @@ userInterface = ui.page_navbar(
     id = "main",
     sidebar = ui.sidebar(
             ui.accordion(
+                ui.accordion_panel("Search",
+                                   ui.input_text("projectSearch_query", None, placeholder = "Project name, developer or ID", width = "100%"),
+                                   ui.output_ui("projectSearch")
+                                   ),
                 ui.accordion_panel("Breakdown",
                                    ui.input_radio_buttons("breakdown", None, list(BREAKDOWN_COLUMNS.keys())),
                                    ),
+                ui.accordion_panel("History",
+                                   ui.output_ui("historySlider"),
+                                   ui.output_ui("snapshotChanges")
+                                   ),
                 ui.accordion_panel("Filters",
                                    ui.output_ui("resetFilters"),
                                    ui.accordion(
                                        *[filter_ui(column.replace(" ", "_"), column) for column in list(BREAKDOWN_COLUMNS.keys())],
+                                       ui.accordion_panel("Location", ui.output_ui("regionFilter")),
                                        open = False)
                                    ),
-                id = "sidebar", open = ["Filters"]),
+                id = "sidebar", open = ["Search", "Filters"]),
             width = 420),
     fillable = True,
-    header = ui.head_content(ui.include_css(pathlib.Path(__file__).parent / "app.css"))
+    header = ui.head_content(ui.include_css(pathlib.Path(__file__).parent / "app.css"), ui.include_js(pathlib.Path(__file__).parent / "app.js"))
     )
 
 #%% SERVER
@@ -355,25 +1499,82 @@ def server(input, output, session):
     #%%% SIDEBAR    
 
     filters = {}
+    region = reactive.value(None)
+    
+    snapshot = reactive.value(REGISTRY)
+    filterState = reactive.value({"VERSION": REGISTRY["VERSION"], "FILTERS": {column: sorted(REGISTRY["STORE"]["CATEGORIES"][column]) for column in BREAKDOWN_COLUMNS}, "REGION": None})
+    filterDeadline = reactive.value(0.0)
+    
+    @reactive.calc
+    def regionSelection():
+        if filterState()["REGION"] is None:
+            return None
+        return regionBitmap(snapshot()["MAP_INDEX"], snapshot()["STORE"], filterState()["REGION"])
+    
+    @reactive.calc
+    def facets():
+        return facetCounts(snapshot()["FILTER_INDEX"], snapshot()["STORE"], filterState()["FILTERS"], regionSelection())
+    
     for column in list(BREAKDOWN_COLUMNS.keys()):
-        filters[column] = filter_server(column.replace(" ", "_"), column, filters, input.resetFilters)
+        filters[column] = filter_server(column.replace(" ", "_"), column, facets, input.resetFilters)
+    
+    @reactive.calc
+    def filterInputs():
+        return {"VERSION": registry()["VERSION"], "FILTERS": {column: filters[column]() for column in filters}, "REGION": region()}
+    
+    @reactive.effect
+    def scheduleFilters():
+        filterInputs()
+        filterDeadline.set(time.monotonic() + FILTER_DEBOUNCE)
+    
+    @reactive.effect
+    def commitFilters():
+        remaining = filterDeadline() - time.monotonic()
+        if remaining > 0:
+            reactive.invalidate_later(remaining)
+        else:
+            with reactive.isolate():
+                if filterInputs() != filterState():
+                    snapshot.set(registry())
+                    filterState.set(filterInputs())
+    
+    def cubeSlice():
+        if filterState()["REGION"] is None:
+            return sliceCube(snapshot()["CUBE"], cubeCells(snapshot()["CUBE"], snapshot()["STORE"], filterState()["FILTERS"]))
+        return buildCube(snapshot()["STORE"], data())
+    
+    @reactive.calc
+    def cube():
+        return cached(AGGREGATE_CACHE, cacheKey("cube", filterState()), cubeSlice)
+    
+    rankState = {"CUBE": None, "CELLS": None, "TOTALS": None}
+    
+    def rankStatistics():
+        if cube()["CELLS"] is None:
+            return rankTotals(snapshot()["STORE"], cube(), rankWeights(cube()))
+        if rankState["CUBE"] is not snapshot()["CUBE"]:
+            totals = rankTotals(snapshot()["STORE"], snapshot()["CUBE"], snapshot()["RANK_WEIGHTS"], cube()["CELLS"])
+        else:
+            totals = updateRankTotals(snapshot()["STORE"], snapshot()["CUBE"], snapshot()["RANK_WEIGHTS"], rankState["TOTALS"], rankState["CELLS"], cube()["CELLS"])
+        rankState.update({"CUBE": snapshot()["CUBE"], "CELLS": cube()["CELLS"], "TOTALS": totals})
+        return totals
+    
+    def summaryStatistics():
+        return buildSummary(snapshot()["STORE"], cube(), data(), rankStatistics())
+    
+    @reactive.calc
+    def summary():
+        return cached(AGGREGATE_CACHE, cacheKey("summary", filterState()), summaryStatistics)
     
     enableResetFilter = reactive.value(False)
     
-    data = reactive.value(DATA)
+    @reactive.calc
+    def data():
+        return filterRows(facets()["BITMAP"], snapshot()["STORE"]["SIZE"])
     
     @reactive.effect
-    def updateData():
-        df = DATA.copy()
-        filtered = False
-        for column in filters:
-            selected = filters[column]()
-            if len(selected) != len(BREAKDOWN_CHOICES[column]):
-                filtered = True
-                df = df[df[column].isin(selected)]
-        if set(df["ID"]) != set(data()["ID"]):    
-            enableResetFilter.set(filtered)
-            data.set(df)
+    def updateResetFilter():
+        enableResetFilter.set(filterState()["REGION"] is not None or any(len(filterState()["FILTERS"][column]) != len(snapshot()["STORE"]["CATEGORIES"][column]) for column in filters))
     
     @render.ui
     def resetFilters():
@@ -381,12 +1582,69 @@ def server(input, output, session):
             return ui.input_action_button("resetFilters", "Reset filters", style = "margin-bottom: 16px;")
         else:
             return ui.input_action_button("resetFilters", "Reset filters", style = "margin-bottom: 16px;", disabled = True)
-         
-    #%%% VALUE BOXES
     
-    for page in ["overview", "projects", "area", "carbon"]:
-        valueBoxes_server("valueBoxes_" + page, data)
-        
+    @render.ui
+    def regionFilter():
+        if filterState()["REGION"] is None:
+            return ui.p("Select projects on the map with the box or lasso tool to filter by location.")
+        else:
+            return ui.TagList(
+                ui.p(f"{np.unpackbits(regionSelection()).sum()} projects in the selected {'box' if 'range' in filterState()['REGION'] else 'lasso'}."),
+                ui.input_action_button("clearRegion", "Clear location")
+                )
+    
+    @reactive.effect
+    @reactive.event(input.projectsMap_selection, ignore_none = False)
+    def updateRegion():
+        region.set(input.projectsMap_selection())
+    
+    @reactive.effect
+    @reactive.event(input.clearRegion, input.resetFilters)
+    def clearRegion():
+        if region() is not None:
+            region.set(None)
+    
+    @render.ui
+    def historySlider():
+        registry()
+        if len(HISTORY_DATES) < 2:
+            return ui.p("Earlier snapshots of the registry will be available here once the data has been updated.")
+        return ui.input_slider("asOf", None, min = HISTORY_DATES[0].item(), max = HISTORY_DATES[-1].item(), value = HISTORY_DATES[-1].item(), time_format = "%d %b %Y")
+    
+    @reactive.calc
+    def asOf():
+        registry()
+        if len(HISTORY_DATES) < 2 or not input.asOf.is_set() or np.datetime64(input.asOf(), "D") >= HISTORY_DATES[-1]:
+            return None
+        return np.datetime64(input.asOf(), "D")
+    
+    def historyView():
+        selections = {column: filterState()["FILTERS"][column] for column in filterState()["FILTERS"] if not set(snapshot()["STORE"]["CATEGORIES"][column]) <= set(filterState()["FILTERS"][column])}
+        history = registryHistory()
+        rows = historyRows(history, asOf(), selections, filterState()["REGION"])
+        cube = buildCube(history["STORE"], rows)
+        return {"STORE": history["STORE"], "MAP_INDEX": history["MAP_INDEX"], "PALETTE": breakdownPalette(snapshot()["STORE"]["CATEGORIES"], history["STORE"]["CATEGORIES"]), "ROWS": rows, "CUBE": cube, "SUMMARY": buildSummary(history["STORE"], cube, rows, rankTotals(history["STORE"], cube, rankWeights(cube)))}
+    
+    @reactive.calc
+    def view():
+        if asOf() is None:
+            return {"STORE": snapshot()["STORE"], "MAP_INDEX": snapshot()["MAP_INDEX"], "PALETTE": snapshot()["PALETTE"], "ROWS": data(), "CUBE": cube(), "SUMMARY": summary()}
+        return cached(AGGREGATE_CACHE, cacheKey("history", filterState(), str(asOf())), historyView)
+    
+    @reactive.calc
+    def viewSummary():
+        return view()["SUMMARY"]
+    
+    @render.ui
+    def snapshotChanges():
+        if asOf() is None:
+            return None
+        changes = historyChanges(registryHistory(), asOf(), HISTORY_DATES[-1])
+        text = f"Since {asOf().item().strftime('%d %b %Y')}, {len(changes['ADDED'])} projects have been added, {len(changes['REMOVED'])} removed and {len(changes['CHANGED'])} changed"
+        if len(changes["COLUMNS"]) > 0:
+            text = text + " (" + ", ".join(f"{column}: {count}" for column, count in changes["COLUMNS"].items()) + ")"
+        return ui.p(text + ".", style = "margin-top: 8px;")
+         
     #%%% LINKS
         
     @reactive.effect
@@ -404,105 +1662,157 @@ def server(input, output, session):
     def linkCarbon():
         ui.update_navs("main", "carbon")
         
-    #%%% OVERVIEW
+    #%%% TASKS
+    
+    def chartTask(output, apply = None):
+        state = {"GENERATION": 0, "KEY": None, "UPDATING": False}
+        
+        if apply is None:
+            def apply(traces):
+                patchTraces(output.widget, traces[0], **traces[1])
+        
+        @reactive.extended_task
+        async def task(generation, function, arguments):
+            if CHART_EXECUTOR is None:
+                return generation, function(*arguments)
+            return generation, await asyncio.get_running_loop().run_in_executor(CHART_EXECUTOR, function, *arguments)
+        
+        def updating(value):
+            if value and not state["UPDATING"]:
+                ui.insert_ui(ui.div(ui.span(class_ = "spinner-border spinner-border-sm"), " Updating", id = output.output_id + "_updating", class_ = "chart-updating"), "#" + output.output_id, "afterEnd")
+            elif state["UPDATING"] and not value:
+                ui.remove_ui("#" + output.output_id + "_updating")
+            state["UPDATING"] = value
+        
+        @reactive.effect
+        def result():
+            generation, traces = task.result()
+            if generation == state["GENERATION"]:
+                updating(False)
+                apply(cacheSet(AGGREGATE_CACHE, state["KEY"], traces))
+        
+        def update(key, function, *arguments):
+            state["GENERATION"] += 1
+            state["KEY"] = key
+            task.cancel()
+            traces = cacheGet(AGGREGATE_CACHE, key)
+            if traces is None:
+                updating(True)
+                task.invoke(state["GENERATION"], function, arguments)
+            else:
+                updating(False)
+                apply(traces)
+        
+        return update
     
-    #%%%% PROJECTS
+    #%%% OVERVIEW
     
-    @render_plotly
-    def overviewProjects():
-        return go.Figure(
-            data = [
-                go.Scattermap(
-                    mode = "markers",
-                    hovertemplate = "%{hovertext}<extra></extra>",
-                    hoverlabel = {"bgcolor": "white"}
+    def overviewPage():
+        
+        valueBoxes_server("valueBoxes_overview", viewSummary)
+        
+        #%%%% PROJECTS
+        
+        @render_plotly
+        def overviewProjects():
+            return go.Figure(
+                data = [
+                    go.Scattermap(
+                        mode = "markers",
+                        hovertemplate = "%{hovertext}<extra></extra>",
+                        hoverlabel = {"bgcolor": "white"}
+                        )
+                    ],
+                layout = go.Layout(
+                    map = MAP_VIEW,
+                    margin = {"l": 0, "r": 0, "t": 28, "b": 0},
+                    modebar = {"remove": ["select", "lasso"]},
+                    template = "plotly_white"
                     )
-                ],
-            layout = go.Layout(
-                map = {
-                    "center": {"lat": 56, "lon": -2.5},
-                    "zoom": 4
-                    },
-                margin = {"l": 0, "r": 0, "t": 28, "b": 0},
-                modebar = {"remove": ["select", "lasso"]},
-                template = "plotly_white"
                 )
-            )
-    
-    @reactive.calc
-    def overviewProjectsUpdate():
-        df = data().copy()
-        df = df[(df["Latitude"] != "") & (df["Longitude"] != "")]
-        overviewProjects.widget.update_traces(
-            lat = df["Latitude"],
-            lon = df["Longitude"],
-            hovertext = df["Name"]
-            )
-    
-    #%%%% AREA
-    
-    @render_plotly
-    def overviewArea():
-        return go.Figure(
-            layout = go.Layout(
-                margin = {"l": 0, "r": 0, "t": 28, "b": 28},
-                template = "plotly_white"
+        
+        def overviewProjectsTraces(tables, rows, viewport):
+            markers = mapMarkers(tables["MAP_INDEX"], tables["STORE"], rows, viewport)
+            return {
+                "lat": markers["LATITUDE"],
+                "lon": markers["LONGITUDE"],
+                "marker": {"size": mapMarkerSizes(markers)},
+                "hovertext": mapMarkerText(tables["STORE"], markers)
+                }
+        
+        def overviewProjectsApply(traces):
+            overviewProjects.widget.update_traces(**traces)
+        
+        overviewProjectsTask = chartTask(overviewProjects, overviewProjectsApply)
+        
+        @reactive.calc
+        def overviewProjectsUpdate():
+            rows = data()[snapshot()["STORE"]["LOCATED"][data()]]
+            overviewProjectsTask(cacheKey("overviewProjects", filterState(), mapViewport(input.overviewProjects_viewport, rows)), overviewProjectsTraces, snapshot(), rows, mapViewport(input.overviewProjects_viewport, rows))
+        
+        #%%%% AREA
+        
+        @render_plotly
+        def overviewArea():
+            return go.Figure(
+                layout = go.Layout(
+                    margin = {"l": 0, "r": 0, "t": 28, "b": 28},
+                    template = "plotly_white"
+                    )
                 )
-            )
+            
+        def overviewAreaTraces(tables, cube):
+            return [
+                go.Treemap(
+                    **subareaTreemap(tables["STORE"], "Peatland", groupTotals(cube["SUBAREAS"])[0]),
+                    branchvalues = "total",
+                    hovertemplate = "<i>%{label}</i><br>%{value:.3s} ha<extra></extra>",
+                    hoverlabel = {"bgcolor": "white"}
+                    )
+                ], {}
         
-    @reactive.calc
-    def overviewAreaUpdate():
-        values = data().copy().sum().to_dict()
-        df = pd.concat([pd.DataFrame({"Type": [re.sub(".*; (.*); .*", "\\1", key)], "Sub-type": [re.sub(".*; .*; (.*)", "\\1", key)], "Area": [values[key]]}) for key in values if "Subarea" in key])
-        df = df.loc[df["Area"] > 0]
-        df_type = df.groupby("Type")["Area"].sum().reset_index()
-        overviewArea.widget.data = []
-        overviewArea.widget.add_treemap(
-            ids = ["Peatland"] + df_type["Type"].tolist() + (df["Type"] + df["Sub-type"]).tolist(),
-            labels = ["Peatland"] + df_type["Type"].tolist() + df["Sub-type"].tolist(),
-            parents = [""] + ["Peatland"] * len(df_type) + df["Type"].tolist(),
-            values = [df_type["Area"].sum()] + df_type["Area"].tolist() + df["Area"].tolist(),
-            branchvalues = "total",
-            marker_colors = ["white"] + [AREA_COLOUR_PALETTE[i][""] for i in df_type["Type"].tolist()] + [AREA_COLOUR_PALETTE[row["Type"]][row["Sub-type"]] for i, row in df.iterrows()],
-            hovertemplate = "<i>%{label}</i><br>%{value:.3s} ha<extra></extra>",
-            hoverlabel = {"bgcolor": "white"}
-            )
-    
-    #%%%% CARBON
-    
-    @render_plotly
-    def overviewCarbon():
-        return go.Figure(
-            layout = go.Layout(
-                xaxis = {"title_text": "Year"},
-                yaxis = {"title_text": "Predicted emission reductions (" + CONTINUOUS_COLUMNS["Predicted Emission Reductions"]["UNIT"] + ")"},
-                margin = {"l": 0, "r": 0, "t": 28, "b": 0},
-                modebar = {"remove": "autoScale2d"},
-                template = "plotly_white"
+        overviewAreaTask = chartTask(overviewArea)
+        
+        @reactive.calc
+        def overviewAreaUpdate():
+            overviewAreaTask(cacheKey("overviewArea", filterState()), overviewAreaTraces, snapshot(), cube())
+        
+        #%%%% CARBON
+        
+        @render_plotly
+        def overviewCarbon():
+            return go.Figure(
+                layout = go.Layout(
+                    xaxis = {"title_text": "Year"},
+                    yaxis = {"title_text": "Predicted emission reductions (" + CONTINUOUS_COLUMNS["Predicted Emission Reductions"]["UNIT"] + ")"},
+                    margin = {"l": 0, "r": 0, "t": 28, "b": 0},
+                    modebar = {"remove": "autoScale2d"},
+                    template = "plotly_white"
+                    )
                 )
-            )
+        
+        def overviewCarbonTraces(cube):
+            years, values = cubePathway(cube, "Predicted Emission Reductions")
+            return [
+                go.Scatter(
+                    x = years,
+                    y = values[0],
+                    stackgroup = "default",
+                    name = "Predicted emission reductions",
+                    mode = "lines",
+                    hovertemplate = "%{x:.0f}<br>%{y:." + CONTINUOUS_COLUMNS["Predicted Emission Reductions"]["ROUNDING"] + "} " + CONTINUOUS_COLUMNS["Predicted Emission Reductions"]["UNIT"] + "<extra></extra>",
+                    hoverlabel = {"bgcolor": "white"}
+                    )
+                ], {}
+        
+        overviewCarbonTask = chartTask(overviewCarbon)
+        
+        @reactive.calc
+        def overviewCarbonUpdate():
+            overviewCarbonTask(cacheKey("overviewCarbon", filterState()), overviewCarbonTraces, cube())
+        
+        return [overviewProjectsUpdate, overviewAreaUpdate, overviewCarbonUpdate]
     
-    @reactive.calc
-    def overviewCarbonUpdate():
-        df = data().copy()
-        df["Year"] = [list(range(df["Start Year"].min() - 1, df["End Year"].max() + 2)) for i in range(0, len(df))]
-        df = df.explode("Year")
-        df["Predicted Emission Reductions"] = (df["Predicted Emission Reductions"] / df["Duration"]).where((df["Year"] >= df["Start Year"]) & (df["Year"] <= df["End Year"]), 0)
-        df = df.groupby("Year")["Predicted Emission Reductions"].sum().reset_index().sort_values("Year")
-        df["Predicted Emission Reductions"] = df["Predicted Emission Reductions"].cumsum()
-        overviewCarbon.widget.data = []
-        overviewCarbon.widget.add_trace(
-            go.Scatter(
-                x = df["Year"],
-                y = df["Predicted Emission Reductions"],
-                stackgroup = "default",
-                name = "Predicted emission reductions",
-                mode = "lines",
-                hovertemplate = "%{x:.0f}<br>%{y:." + CONTINUOUS_COLUMNS["Predicted Emission Reductions"]["ROUNDING"] + "} " + CONTINUOUS_COLUMNS["Predicted Emission Reductions"]["UNIT"] + "<extra></extra>",
-                hoverlabel = {"bgcolor": "white"}
-                )
-            )
-                
     #%%% PROJECTS
     
     #%%%% MODAL
@@ -511,105 +1821,40 @@ def server(input, output, session):
     modal_locationData = reactive.value(None)
     modal_areaData = reactive.value(None)
     
-    @reactive.effect
-    def projectsModal():
-        if modal() is not None:
-            values = DATA.copy().loc[DATA["Name"] == modal()].reset_index().to_dict("index")[0]
-            paragraph1 = [ui.tags.b(values["Name"]), " is a peatland restoration project in ", values["Country"], " with ", ui.tags.b(values["Developer"]), " as the project developer. "]
-            if values["Project Status"] == "Under Development":
-                paragraph1 = paragraph1 + ["The project is under development and the project plan has not yet been validated "]
-                if values["Validator"] == "N/A":
-                    paragraph1 = paragraph1 + ["or a validator selected."]
-                else:
-                    paragraph1 = paragraph1 + ["but ", ui.tags.b(values["Validator"]), " has been selected as the validator."]
-            elif values["Project Status"] == "Validated":
-                paragraph1 = paragraph1 + ["The project plan has been validated by ", ui.tags.b(values["Validator"]), " "]
-                if values["PIU Status"] == "Unissued":
-                    paragraph1 = paragraph1 + ["but restoration is still to be validated and PIUs are not yet issued."]
-                elif values["PIU Status"] == "Issued":
-                    paragraph1 = paragraph1 + ["and PIUs have been issued ahead of restoration validation which is still to occur."]
-                else:
-                    raise ValueError("Unexpected 'PIU Status' value.")
-            elif values["Project Status"] == "Restoration Validated":
-                paragraph1 = paragraph1 + ["Restoration has been completed and validated by ", ui.tags.b(values["Validator"]), " "]
-                if values["PIU Status"] == "Unissued":
-                    paragraph1 = paragraph1 + [" but PIUs are yet to be issued."]
-                elif values["PIU Status"] == "Issued":
-                    paragraph1 = paragraph1 + [" and PIUs have been issued."]
-                else:
-                    raise ValueError("Unexpected 'PIU Status' value.")
-            else:
-                raise ValueError("Unexpected 'Project Status' value.")
-            paragraph2 = ["The project covers ", formatNumber(values["Area"]), " ha and is predicted to lead to ", formatNumber(values["Predicted Emission Reductions"]), " tCO₂e of emission reductions over ", values["Duration"], " years"]
-            if values["Start Year"] == 2025:
-                paragraph2 = paragraph2 + ["."]
-            else:
-                paragraph2 = paragraph2 + [", starting in ", values["Start Year"], "."]
-            if values["Predicted Emission Reductions"] != 0:
-                paragraph2 = paragraph2 + [" ", formatNumber(values["Predicted Claimable Emission Reductions"]) , " tCO₂e of this (", round(values["Predicted Claimable Emission Reductions"] / values["Predicted Emission Reductions"] * 100), "%) is claimable."]
-            df_subtype = pd.concat([pd.DataFrame({"Type": [re.sub(".*; (.*); .*", "\\1", key)], "Sub-type": [re.sub(".*; .*; (.*)", "\\1", key)], "Area": [values[key]]}) for key in values if "Subarea" in key])
-            modal_areaData.set({"df": df_subtype, "name": values["Name"]})
-            df_subtype["Area Percentage"] = df_subtype["Area"] / df_subtype["Area"].sum() * 100
-            df_type = df_subtype.loc[df_subtype["Area Percentage"] > 0].groupby("Type")["Area Percentage"].sum().reset_index().sort_values("Area Percentage", ascending = False)
-            df_subtype = df_subtype.loc[(df_subtype["Type"] == df_type["Type"].iloc[0]) & (df_subtype["Area Percentage"] >= 10)].sort_values("Area Percentage", ascending = False)
-            paragraph3 = "The site is "
-            if len(df_type) == 1:
-                paragraph3 = paragraph3 + "fully "
-            elif round(df_type["Area Percentage"].iloc[0]) == 100:
-                paragraph3 = paragraph3 + "almost fully "
-            else:
-                paragraph3 = paragraph3 + str(round(df_type["Area Percentage"].iloc[0])) + "% "
-            paragraph3 = paragraph3 + df_type["Type"].iloc[0].lower()
-            if len(df_subtype) > 0:
-                paragraph3 = paragraph3 + ", "
-                if (len(df_subtype) == 1) & (df_subtype["Area Percentage"].iloc[0] == df_type["Area Percentage"].iloc[0]):
-                    paragraph3 = paragraph3 + " all of which is classed as '" + df_subtype["Sub-type"].iloc[0] + "'."
-                else:
-                    paragraph3 = paragraph3 + "including "
-                    if len(df_subtype) > 1:
-                        for i in range(0, len(df_subtype) - 1):
-                            paragraph3 = paragraph3 + formatNumber(df_subtype["Area"].iloc[i]) + " ha classed as '" + df_subtype["Sub-type"].iloc[i] + "', "
-                        paragraph3 = paragraph3 + " and "
-                    paragraph3 = paragraph3 + formatNumber(df_subtype["Area"].iloc[-1]) + " ha classed as '" + df_subtype["Sub-type"].iloc[-1] + "'."
-            else:
-                paragraph3 = paragraph3 + "."
-            arguments = [
-                ui.p(paragraph1),
-                ui.p(paragraph2),
-                ui.accordion(ui.accordion_panel("Area Types", output_widget("projectsModalArea")), {"style": "margin-bottom: 16px"}),
-                paragraph3
-                ]
-            if values["Latitude"] != "" and values["Longitude"] != "":
-                arguments = insert(arguments, 1, ui.accordion(ui.accordion_panel("Location", output_widget("projectsModalLocation")), {"style": "margin-bottom: 16px"}))
-                modal_locationData.set({"latitude": values["Latitude"], "longitude": values["Longitude"], "name": values["Name"]})
-            ui.modal_show(
-                ui.modal(
-                    *arguments,
-                    title = modal(), 
-                    footer = [
-                        ui.input_action_button("projectsModalClose", "Close", icon = icon_svg("xmark", height = "14.4px"), style = "flex: 1 0 auto;"), 
-                        ui.a(icon_svg("arrow-up-right-from-square", height = "14.4px"), " View on Peatland Code Registry ", href = values["URL"], style = "flex: 1 0 auto;", class_ = "btn btn-default")
-                        ],
-                    size = "m")
-                )
+    modalState = {"FIGURES": False}
+    
+    def projectsModalKey(name, id):
+        with reactive.isolate():
+            return cacheKey(name, snapshot()["VERSION"], id)
+    
+    def projectsModalEntry(id):
+        with reactive.isolate():
+            tables = snapshot()
+        return cached(MODAL_CACHE, projectsModalKey("projectsModalEntry", id), lambda: projectEntry(tables["STORE"], projectRow(tables["PROJECT_INDEX"], id)))
     
-    @render_plotly
-    def projectsModalLocation():
-        if modal_locationData() is not None:
+    def modalFigures():
+        
+        @render_plotly
+        def projectsModalLocation():
+            if modal_locationData() is not None:
+                return cached(MODAL_CACHE, projectsModalKey("projectsModalLocation", modal_locationData()), projectsModalLocationFigure)
+        
+        def projectsModalLocationFigure():
+            values = projectsModalEntry(modal_locationData())["VALUES"]
             return go.Figure(
                 data = [
                     go.Scattermap(
-                        lat = [modal_locationData()["latitude"]],
-                        lon = [modal_locationData()["longitude"]],
+                        lat = [values["Latitude"]],
+                        lon = [values["Longitude"]],
                         mode = "markers",
-                        hovertext = [modal_locationData()["name"]],
+                        hovertext = [values["Name"]],
                         hovertemplate = "%{hovertext}<extra></extra>",
                         hoverlabel = {"bgcolor": "white"}
                         )
                     ],
                 layout = go.Layout(
                     map = {
-                        "center": {"lat": float(modal_locationData()["latitude"]), "lon": float(modal_locationData()["longitude"])},
+                        "center": {"lat": float(values["Latitude"]), "lon": float(values["Longitude"])},
                         "zoom": 5
                         },
                     margin = {"l": 0, "r": 0, "t": 28, "b": 0},
@@ -617,301 +1862,529 @@ def server(input, output, session):
                     template = "plotly_white"
                     )
                 )
-            
-    @render_plotly
-    def projectsModalArea():
-        return go.Figure(
-            layout = go.Layout(
-                margin = {"l": 0, "r": 0, "t": 28, "b": 28},
-                template = "plotly_white"
+                
+        @render_plotly
+        def projectsModalArea():
+            return go.Figure(
+                layout = go.Layout(
+                    margin = {"l": 0, "r": 0, "t": 28, "b": 28},
+                    template = "plotly_white"
+                    )
                 )
-            )
+        
+        def projectsModalAreaTraces():
+            return [
+                go.Treemap(
+                    **projectsModalEntry(modal_areaData())["TREEMAP"],
+                    branchvalues = "total",
+                    hovertemplate = "<i>%{label}</i><br>%{value:.3r} ha<extra></extra>",
+                    hoverlabel = {"bgcolor": "white"}
+                    )
+                ]
+        
+        @reactive.effect
+        def projectsModalAreaUpdate():
+            if modal_areaData() is not None:
+                patchTraces(projectsModalArea.widget, cached(MODAL_CACHE, projectsModalKey("projectsModalArea", modal_areaData()), projectsModalAreaTraces))
     
     @reactive.effect
-    def projectsModalAreaUpdate():
-        if modal_areaData() is not None:
-            df = modal_areaData()["df"].copy()
-            df = df.loc[df["Area"] > 0]
-            df_type = df.groupby("Type")["Area"].sum().reset_index()
-            projectsModalArea.widget.data = []
-            projectsModalArea.widget.add_treemap(
-                ids = [modal_areaData()["name"]] + df_type["Type"].tolist() + (df["Type"] + df["Sub-type"]).tolist(),
-                labels = [modal_areaData()["name"]] + df_type["Type"].tolist() + df["Sub-type"].tolist(),
-                parents = [""] + [modal_areaData()["name"]] * len(df_type) + df["Type"].tolist(),
-                values = [df_type["Area"].sum()] + df_type["Area"].tolist() + df["Area"].tolist(),
-                branchvalues = "total",
-                marker_colors = ["white"] + [AREA_COLOUR_PALETTE[i][""] for i in df_type["Type"].tolist()] + [AREA_COLOUR_PALETTE[row["Type"]][row["Sub-type"]] for i, row in df.iterrows()],
-                hovertemplate = "<i>%{label}</i><br>%{value:.3r} ha<extra></extra>",
-                hoverlabel = {"bgcolor": "white"}
+    def projectsModal():
+        with reactive.isolate():
+            index = snapshot()["PROJECT_INDEX"]
+        if modal() is not None and projectRow(index, modal()) is not None:
+            if not modalState["FIGURES"]:
+                with reactive.isolate():
+                    modalFigures()
+                modalState["FIGURES"] = True
+            project = projectsModalEntry(modal())
+            values = project["VALUES"]
+            paragraph2 = project["PARAGRAPHS"][1]
+            with reactive.isolate():
+                highlights = [CONTINUOUS_COLUMNS[column]["SINGULAR"] for column in ["Area", "Predicted Emission Reductions"] if viewSummary()["TOTALS"]["COUNT"] >= 10 and values[column] > 0 and values[column] >= summaryQuantile(viewSummary(), column, 0.9)]
+            if len(highlights) > 0:
+                paragraph2 = paragraph2 + [" It is in the top 10% of the filtered projects by ", " and ".join(highlights), "."]
+            modal_areaData.set(modal())
+            arguments = [
+                ui.p(project["PARAGRAPHS"][0]),
+                ui.p(paragraph2),
+                ui.accordion(ui.accordion_panel("Area Types", output_widget("projectsModalArea")), {"style": "margin-bottom: 16px"}),
+                project["PARAGRAPHS"][2]
+                ]
+            if project["LOCATED"]:
+                arguments = insert(arguments, 1, ui.accordion(ui.accordion_panel("Location", output_widget("projectsModalLocation")), {"style": "margin-bottom: 16px"}))
+                modal_locationData.set(modal())
+            ui.modal_show(
+                ui.modal(
+                    *arguments,
+                    title = values["Name"], 
+                    footer = [
+                        ui.input_action_button("projectsModalClose", "Close", icon = icon_svg("xmark", height = "14.4px"), style = "flex: 1 0 auto;"), 
+                        ui.a(icon_svg("arrow-up-right-from-square", height = "14.4px"), " View on Peatland Code Registry ", href = values["URL"], style = "flex: 1 0 auto;", class_ = "btn btn-default")
+                        ],
+                    size = "m")
                 )
-        
+        elif modal() is not None:
+            ui.notification_show("This project is no longer in the registry.", type = "warning")
+            modal.set(None)
+    
     @reactive.effect
     @reactive.event(input.projectsModalClose)
     def projectsModalClose():
         modal.set(None)
         ui.modal_remove()
             
-    #%%%% TABLE
-    
-    projectsTable_header = infoCardHeader_server("projectsTable_header", variables = {"Columns": None})
+    #%%%% SEARCH
     
-    @render.data_frame
-    def projectsTable():
-        df = data().copy()
-        if "Start Year" or "End Year" in projectsTable_header["Columns"]():
-            df["Start Year"] = df["Start Year"].where(df["Start Year"] != 2025, None)
-        if "End Year" in projectsTable_header["Columns"]():
-            df["End Year"] = df["End Year"].where(~df["Start Year"].isna(), None)
-        df = df[["Name", input.breakdown(), *projectsTable_header["Columns"]()]].rename(columns = {column: column + " (" + CONTINUOUS_COLUMNS[column]["UNIT"] + ")" for column in projectsTable_header["Columns"]() if column in CONTINUOUS_COLUMNS})
-        return render.DataTable(df, width = "100%", height = "100%", summary = False, selection_mode = "row")
-    
-    @reactive.effect
-    @reactive.event(projectsTable.cell_selection)
-    async def projectsTableTriggerModal():
-        if len(projectsTable.cell_selection()["rows"]) == 1:
-            modal.set(data()["Name"].iloc[projectsTable.cell_selection()["rows"][0]])
-            await projectsTable.update_cell_selection(None)
-        
-    #%%%% MAP
-    
-    infoCardHeader_server("projectsMap_header", input.breakdown)
-    
-    @render_plotly
-    def projectsMap():
-        return go.Figure(
-            data = [go.Scattermap()],
-            layout = go.Layout(
-                map = {
-                    "center": {"lat": 56, "lon": -2.5},
-                    "zoom": 4
-                    },
-                legend = {"orientation": "h",
-                          "yref": "container"},
-                margin = {"l": 0, "r": 0, "t": 28, "b": 0},
-                modebar = {"remove": ["select", "lasso"]},
-                template = "plotly_white"
-                )
+    @render.ui
+    def projectSearch():
+        rows = searchRows(snapshot()["SEARCH_INDEX"], input.projectSearch_query())
+        if len(rows) == 0:
+            return None
+        return ui.div(
+            *[ui.tags.button(
+                snapshot()["STORE"]["TEXT"]["Name"][row],
+                ui.br(),
+                ui.tags.small(snapshot()["STORE"]["CATEGORIES"]["Developer"][snapshot()["STORE"]["CODES"]["Developer"][row]], " · ", str(snapshot()["STORE"]["ID"][row]), class_ = "text-muted"),
+                type = "button",
+                data_id = str(snapshot()["STORE"]["ID"][row]),
+                class_ = "list-group-item list-group-item-action"
+                ) for row in rows],
+            class_ = "list-group",
+            style = "margin-top: 8px;"
             )
     
-    def projectsMapTriggerModal(trace, points, selector):
-        if len(points.point_inds) == 1:
-            modal.set(trace.hovertext[points.point_inds[0]])
+    @reactive.effect
+    @reactive.event(input.projectSearch_select)
+    def projectSearchTriggerModal():
+        modal.set(int(input.projectSearch_select()))
         
-    @reactive.calc
-    def projectsMapUpdate():
-        df = data().copy()
-        df = df[(df["Latitude"] != "") & (df["Longitude"] != "")]
-        df, order = orderAndTruncateBreakdown(df, input.breakdown())
-        projectsMap.widget.data = [projectsMap.widget.data[0]]
-        projectsMap.widget.add_traces([
-            go.Scattermap(
-                lat = df.loc[df[input.breakdown()] == value, "Latitude"],
-                lon = df.loc[df[input.breakdown()] == value, "Longitude"],
-                name = value,
-                mode = "markers",
-                marker = {"color": BREAKDOWN_COLOUR_PALETTE[input.breakdown()][value]},
-                hovertext = df.loc[df[input.breakdown()] == value, "Name"],
-                hovertemplate = "%{hovertext}<extra></extra>",
-                hoverlabel = {"bgcolor": "white"}
-                )
-            for value in order])
-        for i in range(1, len(projectsMap.widget.data)):
-            projectsMap.widget.data[i].on_click(projectsMapTriggerModal)
-
-    #%%% AREA
-    
-    #%%%% BREAKDOWN
-    
-    infoCardHeader_server("areaBreakdown_header", input.breakdown)
-    
-    @render_plotly
-    def areaBreakdown():
-        return go.Figure(
-            layout = go.Layout(
-                xaxis = {"title_text": "Area (ha)"},
-                barmode = "stack",
-                margin = {"l": 0, "r": 0, "t": 28, "b": 0},
-                modebar = {"remove": ["select2d", "lasso2d", "autoScale2d"]},
-                template = "plotly_white"
+    def projectsPage():
+        
+        valueBoxes_server("valueBoxes_projects", viewSummary)
+        
+        #%%%% TABLE
+        
+        projectsTable_header = infoCardHeader_server("projectsTable_header", variables = {"Columns": None})
+        
+        projectsTableSort = reactive.value(None)
+        projectsTablePage = reactive.value(0)
+        
+        @reactive.calc
+        def projectsTableRows():
+            return tableRows(snapshot()["TABLE_INDEX"], snapshot()["STORE"], data(), input.projectsTable_search(), projectsTableSort())
+        
+        @reactive.effect
+        @reactive.event(projectsTableRows)
+        def resetProjectsTablePage():
+            projectsTablePage.set(0)
+        
+        @reactive.effect
+        @reactive.event(input.projectsTable_page)
+        def updateProjectsTablePage():
+            projectsTablePage.set(int(input.projectsTable_page()))
+        
+        @reactive.effect
+        @reactive.event(input.projectsTable_sort)
+        def updateProjectsTableSort():
+            with reactive.isolate():
+                sort = projectsTableSort()
+            if sort is None or sort["COLUMN"] != input.projectsTable_sort():
+                projectsTableSort.set({"COLUMN": input.projectsTable_sort(), "DIRECTION": "ASCENDING"})
+            elif sort["DIRECTION"] == "ASCENDING":
+                projectsTableSort.set({"COLUMN": input.projectsTable_sort(), "DIRECTION": "DESCENDING"})
+            else:
+                projectsTableSort.set(None)
+        
+        @render.ui
+        def projectsTable():
+            rows = projectsTableRows()
+            page = min(projectsTablePage(), max(0, len(rows) - 1) // TABLE_PAGE_SIZE)
+            window = rows[page * TABLE_PAGE_SIZE:(page + 1) * TABLE_PAGE_SIZE]
+            columns = ["Name", input.breakdown(), *projectsTable_header["Columns"]()]
+            values = [tableValues(snapshot()["STORE"], column, window) for column in columns]
+            sort = projectsTableSort()
+            headers = []
+            for column in columns:
+                label = column + " (" + CONTINUOUS_COLUMNS[column]["UNIT"] + ")" if column in CONTINUOUS_COLUMNS else column
+                if sort is not None and sort["COLUMN"] == column:
+                    label = [label, " ", icon_svg("arrow-up" if sort["DIRECTION"] == "ASCENDING" else "arrow-down", height = "12px", margin_right = "0px")]
+                headers.append(ui.tags.th(label, data_column = column))
+            return ui.div(
+                ui.div(
+                    ui.tags.table(
+                        ui.tags.thead(ui.tags.tr(*headers)),
+                        ui.tags.tbody(*[ui.tags.tr(*[ui.tags.td(value[i]) for value in values], data_id = str(snapshot()["STORE"]["ID"][row])) for i, row in enumerate(window)]),
+                        class_ = "table table-sm table-hover projects-table"
+                        ),
+                    style = "flex: 1 1 auto; overflow: auto;"
+                    ),
+                ui.div(
+                    ui.tags.button("Previous", data_page = str(page - 1), disabled = page == 0, class_ = "btn btn-default btn-sm"),
+                    ui.span(f"{page * TABLE_PAGE_SIZE + min(1, len(window))}–{page * TABLE_PAGE_SIZE + len(window)} of {len(rows)} projects"),
+                    ui.tags.button("Next", data_page = str(page + 1), disabled = (page + 1) * TABLE_PAGE_SIZE >= len(rows), class_ = "btn btn-default btn-sm"),
+                    style = "display: flex; justify-content: space-between; align-items: center; padding-top: 8px;"
+                    ),
+                style = "display: flex; flex-direction: column; height: 100%;"
                 )
-            )
+        
+        @reactive.effect
+        @reactive.event(input.projectsTable_select)
+        def projectsTableTriggerModal():
+            modal.set(int(input.projectsTable_select()))
             
-    @reactive.calc
-    def areaBreakdownUpdate():
-        df = data().copy()
-        df = df.melt(input.breakdown(), [column for column in df.columns if column.startswith("Subarea")], "Subarea Type", "Subarea Area")
-        df, order = orderAndTruncateBreakdown(df, input.breakdown(), "Subarea Area")
-        df[input.breakdown()] = df[input.breakdown()].astype(pd.CategoricalDtype(order, ordered = True))
-        df["Area Type"] = df["Subarea Type"].str.replace(".*; (.*);.*", "\\1", regex = True)
-        df["Area Type"] = df["Area Type"].astype(pd.CategoricalDtype(df.groupby("Area Type")["Subarea Area"].sum().reset_index().sort_values("Subarea Area")["Area Type"].to_list(), ordered = True))
-        df["Subarea Type"] = df["Subarea Type"].str.replace(".*; ", "", regex = True).astype(pd.CategoricalDtype(["Near Natural", "Modified", "Drained (Artificial)", "Drained (Hagg/Gully)", "Grassland (Extensive)", 'Grassland (Intensive)', "Actively Eroding (Flat Bare)", "Actively Eroding (Hagg/Gully)", "Cropland"], ordered = True))
-        df = df.groupby([input.breakdown(), "Area Type", "Subarea Type"], observed = True)["Subarea Area"].sum().reset_index().sort_values(input.breakdown())
-        areaBreakdown.widget.data = []
-        areaBreakdown.widget.add_traces([
-            go.Bar(
-                x = df.loc[(df["Area Type"] == row["Area Type"]) & (df["Subarea Type"] == row["Subarea Type"]), "Subarea Area"],
-                y = df.loc[(df["Area Type"] == row["Area Type"]) & (df["Subarea Type"] == row["Subarea Type"]), input.breakdown()],
-                orientation = "h",
-                name = row["Subarea Type"],
-                legendgroup = row["Area Type"],
-                legendgrouptitle_text = row["Area Type"],
-                marker = {"color": AREA_COLOUR_PALETTE[row["Area Type"]][row["Subarea Type"]]},
-                hovertemplate = "<b>" + str(row["Area Type"]) + "</b><br><i>" + str(row["Subarea Type"]) + "</i><br>%{x:.3s} ha<extra></extra>",
-                hoverlabel = {"bgcolor": "white"}
+        #%%%% MAP
+        
+        infoCardHeader_server("projectsMap_header", input.breakdown)
+        
+        @render_plotly
+        def projectsMap():
+            return go.Figure(
+                data = [
+                    go.Scattermap(
+                        mode = "markers",
+                        hovertemplate = "%{hovertext}<extra></extra>",
+                        hoverlabel = {"bgcolor": "white"},
+                        showlegend = False
+                        )
+                    ],
+                layout = go.Layout(
+                    map = MAP_VIEW,
+                    legend = {"orientation": "h",
+                              "yref": "container",
+                              "itemclick": False,
+                              "itemdoubleclick": False},
+                    margin = {"l": 0, "r": 0, "t": 28, "b": 0},
+                    template = "plotly_white"
+                    )
                 )
-            for i, row in df[["Area Type", "Subarea Type"]].drop_duplicates().sort_values(["Area Type", "Subarea Type"], ascending = False).iterrows()])
-        areaBreakdown.widget.update_layout(
-            yaxis_title_text = input.breakdown()
-            )
-    
-    #%%%% DISTRIBUTION
+        
+        def projectsMapTriggerModal(trace, points, selector):
+            if len(points.point_inds) == 1 and trace.customdata[points.point_inds[0]] >= 0:
+                modal.set(int(trace.customdata[points.point_inds[0]]))
+            
+        def projectsMapTraces(view, rows, ranks, breakdown, viewport):
+            order, groups = rankBreakdown(view["STORE"], breakdown, ranks, "LOCATED", "LOCATED")
+            markers = mapMarkers(view["MAP_INDEX"], view["STORE"], rows, viewport, groups[view["STORE"]["CODES"][breakdown][rows]])
+            markers = {key: value[np.argsort(markers["GROUPS"], kind = "stable")] for key, value in markers.items()}
+            return [
+                go.Scattermap(
+                    lat = markers["LATITUDE"],
+                    lon = markers["LONGITUDE"],
+                    mode = "markers",
+                    marker = {"color": markers["GROUPS"] + 0.5, "size": mapMarkerSizes(markers), "colorscale": discreteColourscale([view["PALETTE"][breakdown][value] for value in order] or ["white"]), "cmin": 0, "cmax": max(len(order), 1)},
+                    hovertext = mapMarkerText(view["STORE"], markers),
+                    customdata = np.where(markers["ROWS"] >= 0, view["STORE"]["ID"][markers["ROWS"]], -1),
+                    hovertemplate = "%{hovertext}<extra></extra>",
+                    hoverlabel = {"bgcolor": "white"},
+                    showlegend = False
+                    )
+                ] + [
+                go.Scattermap(
+                    lat = [None],
+                    lon = [None],
+                    name = value,
+                    mode = "markers",
+                    marker = {"color": view["PALETTE"][breakdown][value]},
+                    hoverinfo = "skip"
+                    )
+                for value in order], {}
+        
+        def projectsMapApply(traces):
+            patchTraces(projectsMap.widget, traces[0], **traces[1])
+            projectsMap.widget.data[0].on_click(projectsMapTriggerModal)
+        
+        projectsMapTask = chartTask(projectsMap, projectsMapApply)
+        
+        @reactive.effect
+        @reactive.event(region, ignore_none = False, ignore_init = True)
+        def clearProjectsMapSelection():
+            if region() is None:
+                projectsMap.widget.update_traces(selectedpoints = None, selector = 0)
+                projectsMap.widget.update_layout(selections = [])
+        
+        @reactive.calc
+        def projectsMapUpdate():
+            rows = view()["ROWS"][view()["STORE"]["LOCATED"][view()["ROWS"]]]
+            projectsMapTask(cacheKey("projectsMap", filterState(), str(asOf()), input.breakdown(), mapViewport(input.projectsMap_viewport, rows)), projectsMapTraces, view(), rows, viewSummary()["RANKS"][input.breakdown()], input.breakdown(), mapViewport(input.projectsMap_viewport, rows))
+        
+        return [projectsMapUpdate]
     
-    areaDistribution_header = infoCardHeader_server("areaDistribution_header", input.breakdown, {"Y-axis": "PLURAL"})
+    #%%% AREA
     
-    @render_plotly
-    def areaDistribution():
-        return go.Figure(
-            layout = go.Layout(
-                showlegend = False,
-                margin = {"l": 0, "r": 0, "t": 28, "b": 0},
-                modebar = {"remove": ["select2d", "lasso2d", "autoScale2d"]},
-                template = "plotly_white"
+    def areaPage():
+        
+        valueBoxes_server("valueBoxes_area", viewSummary)
+        
+        #%%%% BREAKDOWN
+        
+        infoCardHeader_server("areaBreakdown_header", input.breakdown)
+        
+        @render_plotly
+        def areaBreakdown():
+            return go.Figure(
+                layout = go.Layout(
+                    xaxis = {"title_text": "Area (ha)"},
+                    barmode = "stack",
+                    margin = {"l": 0, "r": 0, "t": 28, "b": 0},
+                    modebar = {"remove": ["select2d", "lasso2d", "autoScale2d"]},
+                    template = "plotly_white"
+                    )
                 )
-            )
+                
+        def areaBreakdownTraces(tables, cube, ranks, breakdown):
+            order, groups = rankBreakdown(tables["STORE"], breakdown, ranks, "Subarea Area")
+            areas = groupTotals(cube["SUBAREAS"], groups[cube["CODES"][breakdown]], len(order))
+            types = tables["STORE"]["SUBAREA_INDEX"]["Type"].tolist()
+            subtypes = tables["STORE"]["SUBAREA_INDEX"]["Sub-type"].tolist()
+            typeNames, typeGroups = np.unique(types, return_inverse = True)
+            typeRanks = np.argsort(np.argsort(groupTotals(areas.sum(axis = 0), typeGroups, len(typeNames)), kind = "stable"), kind = "stable")[typeGroups]
+            subtypeRanks = [["Near Natural", "Modified", "Drained (Artificial)", "Drained (Hagg/Gully)", "Grassland (Extensive)", 'Grassland (Intensive)', "Actively Eroding (Flat Bare)", "Actively Eroding (Hagg/Gully)", "Cropland"].index(i) for i in subtypes]
+            return [
+                go.Bar(
+                    x = areas[:, i],
+                    y = order,
+                    orientation = "h",
+                    name = subtypes[i],
+                    legendgroup = types[i],
+                    legendgrouptitle_text = types[i],
+                    marker = {"color": AREA_COLOUR_PALETTE[types[i]][subtypes[i]]},
+                    hovertemplate = "<b>" + types[i] + "</b><br><i>" + subtypes[i] + "</i><br>%{x:.3s} ha<extra></extra>",
+                    hoverlabel = {"bgcolor": "white"}
+                    )
+                for i in np.lexsort((subtypeRanks, typeRanks))[::-1]], {
+                    "yaxis_title_text": breakdown
+                    }
         
-    @reactive.calc
-    def areaDistributionUpdate():
-        df = data().copy()
-        df, order = orderAndTruncateBreakdown(df, input.breakdown(), areaDistribution_header["Y-axis"]())
-        areaDistribution.widget.data = []
-        areaDistribution.widget.add_traces([
-            go.Violin(
-                x = df.loc[df[input.breakdown()] == value, input.breakdown()],
-                y = df.loc[df[input.breakdown()] == value, areaDistribution_header["Y-axis"]()],
-                spanmode = "hard",
-                points = "all",
-                pointpos = 0,
-                jitter = 0,
-                line_color = BREAKDOWN_COLOUR_PALETTE[input.breakdown()][value],
-                hoveron = "points",
-                hovertext = df.loc[df[input.breakdown()] == value, "Name"],
-                hovertemplate = "<i>%{hovertext}</i><br>%{y:." + CONTINUOUS_COLUMNS[areaDistribution_header["Y-axis"]()]["ROUNDING"] + "} " + CONTINUOUS_COLUMNS[areaDistribution_header["Y-axis"]()]["UNIT"] + "<extra></extra>",
-                hoverlabel = {"bgcolor": "white"}
+        areaBreakdownTask = chartTask(areaBreakdown)
+        
+        @reactive.calc
+        def areaBreakdownUpdate():
+            areaBreakdownTask(cacheKey("areaBreakdown", filterState(), input.breakdown()), areaBreakdownTraces, snapshot(), cube(), summary()["RANKS"][input.breakdown()], input.breakdown())
+        
+        #%%%% DISTRIBUTION
+        
+        areaDistribution_header = infoCardHeader_server("areaDistribution_header", input.breakdown, {"Y-axis": "PLURAL"})
+        
+        @render_plotly
+        def areaDistribution():
+            return go.Figure(
+                layout = go.Layout(
+                    showlegend = False,
+                    margin = {"l": 0, "r": 0, "t": 28, "b": 0},
+                    modebar = {"remove": ["select2d", "lasso2d", "autoScale2d"]},
+                    template = "plotly_white"
+                    )
                 )
-            for value in order])
-        areaDistribution.widget.update_layout(
-            xaxis_title_text = input.breakdown(),
-            yaxis_title_text = areaDistribution_header["Y-axis"]().capitalize() + " (" + CONTINUOUS_COLUMNS[areaDistribution_header["Y-axis"]()]["UNIT"] + ")"
-            )
+            
+        def areaDistributionTraces(tables, rows, ranks, breakdown, column):
+            order, groups = rankBreakdown(tables["STORE"], breakdown, ranks, column)
+            values = tables["STORE"]["NUMERIC"][column][rows].astype(np.float64)
+            shapes = distributionShapes(values, groups[tables["STORE"]["CODES"][breakdown][rows]], len(order))
+            traces = []
+            for i, value in enumerate(order):
+                traces += [
+                    go.Scatter(
+                        x = np.concatenate([i - 0.4 * shapes[i]["DENSITY"], i + 0.4 * shapes[i]["DENSITY"][::-1]]),
+                        y = np.concatenate([shapes[i]["GRID"], shapes[i]["GRID"][::-1]]),
+                        name = value,
+                        legendgroup = value,
+                        mode = "lines",
+                        fill = "toself",
+                        line = {"color": tables["PALETTE"][breakdown][value], "width": 1},
+                        hoverinfo = "skip"
+                        ),
+                    go.Scatter(
+                        x = [i, i, i],
+                        y = shapes[i]["QUARTILES"],
+                        name = "Quartiles",
+                        legendgroup = value,
+                        mode = "lines+markers",
+                        line = {"color": tables["PALETTE"][breakdown][value], "width": 4},
+                        marker = {"color": "white", "size": [0, 6, 0], "line": {"color": tables["PALETTE"][breakdown][value], "width": 1}},
+                        customdata = ["Lower quartile", "Median", "Upper quartile"],
+                        hovertemplate = "<i>%{customdata}</i><br>%{y:." + CONTINUOUS_COLUMNS[column]["ROUNDING"] + "} " + CONTINUOUS_COLUMNS[column]["UNIT"] + "<extra></extra>",
+                        hoverlabel = {"bgcolor": "white"}
+                        ),
+                    go.Scatter(
+                        x = np.full(len(shapes[i]["POINTS"]), i),
+                        y = values[shapes[i]["POINTS"]],
+                        name = "Points",
+                        legendgroup = value,
+                        mode = "markers",
+                        marker = {"color": tables["PALETTE"][breakdown][value], "size": 4},
+                        hovertext = tables["STORE"]["TEXT"]["Name"][rows[shapes[i]["POINTS"]]],
+                        hovertemplate = "<i>%{hovertext}</i><br>%{y:." + CONTINUOUS_COLUMNS[column]["ROUNDING"] + "} " + CONTINUOUS_COLUMNS[column]["UNIT"] + "<extra></extra>",
+                        hoverlabel = {"bgcolor": "white"}
+                        )
+                    ]
+            return traces, {
+                "xaxis_title_text": breakdown,
+                "xaxis_tickvals": list(range(0, len(order))),
+                "xaxis_ticktext": order,
+                "xaxis_range": [-0.5, max(len(order), 1) - 0.5],
+                "yaxis_title_text": column.capitalize() + " (" + CONTINUOUS_COLUMNS[column]["UNIT"] + ")"
+                }
+        
+        areaDistributionTask = chartTask(areaDistribution)
+        
+        @reactive.calc
+        def areaDistributionUpdate():
+            areaDistributionTask(cacheKey("areaDistribution", filterState(), input.breakdown(), areaDistribution_header["Y-axis"]()), areaDistributionTraces, snapshot(), data(), summary()["RANKS"][input.breakdown()], input.breakdown(), areaDistribution_header["Y-axis"]())
+        
+        return [areaBreakdownUpdate, areaDistributionUpdate]
     
     #%%% CARBON
     
-    #%%%% PATHWAY
-    
-    carbonPathway_header = infoCardHeader_server("carbonPathway_header", input.breakdown, {"Y-axis": "SINGULAR"})
-        
-    @render_plotly
-    def carbonPathway():
-        return go.Figure(
-            layout = go.Layout(
-                xaxis = {"title_text": "Year"},
-                legend = {"traceorder": "normal",
-                          "orientation": "h",
-                          "yref": "container"},
-                hovermode = "x unified",
-                margin = {"l": 0, "r": 0, "t": 28, "b": 0},
-                modebar = {"remove": "autoScale2d"},
-                template = "plotly_white"
-                )
-            )
-    
-    @reactive.calc
-    def carbonPathwayUpdate():
-        df = data().copy()
-        df, order = orderAndTruncateBreakdown(df, input.breakdown(), carbonPathway_header["Y-axis"]())
-        df["Year"] = [list(range(df["Start Year"].min() - 1, df["End Year"].max() + 2)) for i in range(0, len(df))]
-        df = df.explode("Year")
-        df[carbonPathway_header["Y-axis"]()] = (df[carbonPathway_header["Y-axis"]()] / df["Duration"]).where((df["Year"] >= df["Start Year"]) & (df["Year"] <= df["End Year"]), 0)
-        df = df.groupby(["Year", input.breakdown()])[carbonPathway_header["Y-axis"]()].sum().reset_index().sort_values("Year")
-        df[carbonPathway_header["Y-axis"]()] = df.groupby(input.breakdown())[carbonPathway_header["Y-axis"]()].cumsum()
-        carbonPathway.widget.data = []
-        carbonPathway.widget.add_traces([
-            go.Scatter(
-                x = df.loc[df[input.breakdown()] == value, "Year"],
-                y = df.loc[df[input.breakdown()] == value, carbonPathway_header["Y-axis"]()],
-                stackgroup = "default",
-                name = value,
-                mode = "lines",
-                marker = {"color": BREAKDOWN_COLOUR_PALETTE[input.breakdown()][value]},
-                hovertemplate = "%{y:." + CONTINUOUS_COLUMNS[carbonPathway_header["Y-axis"]()]["ROUNDING"] + "} " + CONTINUOUS_COLUMNS[carbonPathway_header["Y-axis"]()]["UNIT"]
-                )
-            for value in order])
-        carbonPathway.widget.update_layout(
-            yaxis_title_text = carbonPathway_header["Y-axis"]().capitalize() + " (" + CONTINUOUS_COLUMNS[carbonPathway_header["Y-axis"]()]["UNIT"] + ")",
-            legend_title_text = input.breakdown()
-            )
-    
-    #%%%% POINTS
-    
-    carbonPoints_header = infoCardHeader_server("carbonPoints_header", input.breakdown, {"X-axis": "PLURAL", "Y-axis": "PLURAL"})
-    
-    @render_plotly
-    def carbonPoints():
-        return go.Figure(
-            layout = go.Layout(
-                legend = {"orientation": "h",
-                          "yref": "container"},
-                margin = {"l": 0, "r": 0, "t": 28, "b": 0},
-                modebar = {"remove": ["select2d", "lasso2d", "autoScale2d"]},
-                template = "plotly_white"
+    def carbonPage():
+        
+        valueBoxes_server("valueBoxes_carbon", viewSummary)
+        
+        #%%%% PATHWAY
+        
+        carbonPathway_header = infoCardHeader_server("carbonPathway_header", input.breakdown, {"Y-axis": "SINGULAR"})
+            
+        @render_plotly
+        def carbonPathway():
+            return go.Figure(
+                layout = go.Layout(
+                    xaxis = {"title_text": "Year"},
+                    legend = {"traceorder": "normal",
+                              "orientation": "h",
+                              "yref": "container"},
+                    hovermode = "x unified",
+                    margin = {"l": 0, "r": 0, "t": 28, "b": 0},
+                    modebar = {"remove": "autoScale2d"},
+                    template = "plotly_white"
+                    )
                 )
-            )
-    
-    @reactive.calc
-    def carbonPointsUpdate():
-        df = data().copy()
-        df["Original Breakdown"] = df[input.breakdown()]
-        df, order = orderAndTruncateBreakdown(df, input.breakdown(), carbonPoints_header["Y-axis"]())
-        carbonPoints.widget.data = []
-        carbonPoints.widget.add_traces([
-            go.Scatter(
-                x = df.loc[df[input.breakdown()] == value, carbonPoints_header["X-axis"]()],
-                y = df.loc[df[input.breakdown()] == value, carbonPoints_header["Y-axis"]()],
-                name = value,
-                mode = "markers",
-                marker = {"color": BREAKDOWN_COLOUR_PALETTE[input.breakdown()][value]},
-                hovertext = df.loc[df[input.breakdown()] == value, "Name"],
-                hovertemplate = "<i>%{hovertext}</i><br>%{x:." + CONTINUOUS_COLUMNS[carbonPoints_header["X-axis"]()]["ROUNDING"] + "} " + CONTINUOUS_COLUMNS[carbonPoints_header["X-axis"]()]["UNIT"] + "<br>%{y:." + CONTINUOUS_COLUMNS[carbonPoints_header["Y-axis"]()]["ROUNDING"] + "} " + CONTINUOUS_COLUMNS[carbonPoints_header["Y-axis"]()]["UNIT"] + "<extra></extra>",
-                hoverlabel = {"bgcolor": "white"}
+        
+        def carbonPathwayTraces(view, ranks, breakdown, column):
+            cube = view["CUBE"]
+            order, groups = rankBreakdown(view["STORE"], breakdown, ranks, column)
+            years, values = cubePathway(cube, column, groups[cube["CODES"][breakdown]], len(order))
+            return [
+                go.Scatter(
+                    x = years,
+                    y = values[i],
+                    stackgroup = "default",
+                    name = value,
+                    mode = "lines",
+                    marker = {"color": view["PALETTE"][breakdown][value]},
+                    hovertemplate = "%{y:." + CONTINUOUS_COLUMNS[column]["ROUNDING"] + "} " + CONTINUOUS_COLUMNS[column]["UNIT"]
+                    )
+                for i, value in enumerate(order)], {
+                    "yaxis_title_text": column.capitalize() + " (" + CONTINUOUS_COLUMNS[column]["UNIT"] + ")",
+                    "legend_title_text": breakdown
+                    }
+        
+        carbonPathwayTask = chartTask(carbonPathway)
+        
+        @reactive.calc
+        def carbonPathwayUpdate():
+            carbonPathwayTask(cacheKey("carbonPathway", filterState(), str(asOf()), input.breakdown(), carbonPathway_header["Y-axis"]()), carbonPathwayTraces, view(), viewSummary()["RANKS"][input.breakdown()], input.breakdown(), carbonPathway_header["Y-axis"]())
+        
+        #%%%% POINTS
+        
+        carbonPoints_header = infoCardHeader_server("carbonPoints_header", input.breakdown, {"X-axis": "PLURAL", "Y-axis": "PLURAL"})
+        
+        @render_plotly
+        def carbonPoints():
+            return go.Figure(
+                layout = go.Layout(
+                    legend = {"orientation": "h",
+                              "yref": "container"},
+                    margin = {"l": 0, "r": 0, "t": 28, "b": 0},
+                    modebar = {"remove": ["select2d", "lasso2d", "autoScale2d"]},
+                    template = "plotly_white"
+                    )
                 )
-            for value in order])
-        carbonPoints.widget.update_layout(
-            xaxis_title_text = carbonPoints_header["X-axis"]().capitalize() + " (" + CONTINUOUS_COLUMNS[carbonPoints_header["X-axis"]()]["UNIT"] + ")",
-            yaxis_title_text = carbonPoints_header["Y-axis"]().capitalize() + " (" + CONTINUOUS_COLUMNS[carbonPoints_header["Y-axis"]()]["UNIT"] + ")",
-            legend_title_text = input.breakdown()
-            )
         
+        def carbonPointsTraces(tables, rows, ranks, breakdown, x, y, viewport):
+            order, groups = rankBreakdown(tables["STORE"], breakdown, ranks, y)
+            layout = {
+                "xaxis_title_text": x.capitalize() + " (" + CONTINUOUS_COLUMNS[x]["UNIT"] + ")",
+                "yaxis_title_text": y.capitalize() + " (" + CONTINUOUS_COLUMNS[y]["UNIT"] + ")",
+                "legend_title_text": breakdown
+                }
+            if viewport is not None:
+                rows = rows[(tables["STORE"]["NUMERIC"][x][rows] >= viewport["x"][0]) & (tables["STORE"]["NUMERIC"][x][rows] <= viewport["x"][1]) & (tables["STORE"]["NUMERIC"][y][rows] >= viewport["y"][0]) & (tables["STORE"]["NUMERIC"][y][rows] <= viewport["y"][1])]
+            if len(rows) > CARBON_POINTS_LIMIT:
+                ranges = [viewport["x"], viewport["y"]] if viewport is not None else [[tables["STORE"]["NUMERIC"][x][rows].min(), tables["STORE"]["NUMERIC"][x][rows].max()], [tables["STORE"]["NUMERIC"][y][rows].min(), tables["STORE"]["NUMERIC"][y][rows].max()]]
+                counts, xEdges, yEdges = np.histogram2d(tables["STORE"]["NUMERIC"][x][rows], tables["STORE"]["NUMERIC"][y][rows], CARBON_POINTS_BINS, ranges)
+                return [
+                    go.Heatmap(
+                        x = (xEdges[:-1] + xEdges[1:]) / 2,
+                        y = (yEdges[:-1] + yEdges[1:]) / 2,
+                        z = np.where(counts.T > 0, counts.T, None),
+                        name = "Projects",
+                        colorscale = "Blues",
+                        showscale = False,
+                        hovertemplate = "%{x:." + CONTINUOUS_COLUMNS[x]["ROUNDING"] + "} " + CONTINUOUS_COLUMNS[x]["UNIT"] + "<br>%{y:." + CONTINUOUS_COLUMNS[y]["ROUNDING"] + "} " + CONTINUOUS_COLUMNS[y]["UNIT"] + "<br>%{z} projects<extra></extra>",
+                        hoverlabel = {"bgcolor": "white"}
+                        )
+                    ], layout
+            codes = groups[tables["STORE"]["CODES"][breakdown][rows]]
+            scatter = go.Scattergl if len(rows) > CARBON_POINTS_WEBGL else go.Scatter
+            return [
+                scatter(
+                    x = tables["STORE"]["NUMERIC"][x][rows[codes == i]],
+                    y = tables["STORE"]["NUMERIC"][y][rows[codes == i]],
+                    name = value,
+                    mode = "markers",
+                    marker = {"color": tables["PALETTE"][breakdown][value]},
+                    hovertext = tables["STORE"]["TEXT"]["Name"][rows[codes == i]],
+                    hovertemplate = "<i>%{hovertext}</i><br>%{x:." + CONTINUOUS_COLUMNS[x]["ROUNDING"] + "} " + CONTINUOUS_COLUMNS[x]["UNIT"] + "<br>%{y:." + CONTINUOUS_COLUMNS[y]["ROUNDING"] + "} " + CONTINUOUS_COLUMNS[y]["UNIT"] + "<extra></extra>",
+                    hoverlabel = {"bgcolor": "white"}
+                    )
+                for i, value in enumerate(order)], layout
+        
+        carbonPointsTask = chartTask(carbonPoints)
+        carbonPointsRange = reactive.value(None)
+        
+        @reactive.effect
+        @reactive.event(input.carbonPoints_viewport, ignore_none = False)
+        def updateCarbonPointsRange():
+            carbonPointsRange.set(input.carbonPoints_viewport())
+        
+        @reactive.effect
+        @reactive.event(carbonPoints_header["X-axis"], carbonPoints_header["Y-axis"], ignore_init = True)
+        def resetCarbonPointsRange():
+            carbonPointsRange.set(None)
+            carbonPoints.widget.update_layout(xaxis_autorange = True, yaxis_autorange = True)
+        
+        @reactive.calc
+        def carbonPointsUpdate():
+            carbonPointsTask(cacheKey("carbonPoints", filterState(), input.breakdown(), carbonPoints_header["X-axis"](), carbonPoints_header["Y-axis"](), pointsViewport(carbonPointsRange, data())), carbonPointsTraces, snapshot(), data(), summary()["RANKS"][input.breakdown()], input.breakdown(), carbonPoints_header["X-axis"](), carbonPoints_header["Y-axis"](), pointsViewport(carbonPointsRange, data()))
+        
+        return [carbonPathwayUpdate, carbonPointsUpdate]
+    
     #%%% UPDATES
         
+    pages = {}
+    
+    @reactive.effect(priority = 1)
+    def buildPage():
+        if input.main() not in pages:
+            with reactive.isolate():
+                if input.main() == "overview":
+                    pages["overview"] = overviewPage()
+                elif input.main() == "projects":
+                    pages["projects"] = projectsPage()
+                elif input.main() == "area":
+                    pages["area"] = areaPage()
+                elif input.main() == "carbon":
+                    pages["carbon"] = carbonPage()
+                else:
+                    raise ValueError("input.main() not in ['overview', 'projects', 'area', 'carbon']")
+    
     @reactive.effect(priority = -1)
     def updateTrigger():
         if input.main() == "overview":
             ui.update_accordion("sidebar", show = ["Filters"])
-            overviewProjectsUpdate()
-            overviewAreaUpdate()
-            overviewCarbonUpdate()
         else:
             ui.update_accordion("sidebar", show = ["Breakdown", "Filters"])
-            if input.main() == "projects":
-                projectsMapUpdate()
-            elif input.main() == "area":
-                areaBreakdownUpdate()
-                areaDistributionUpdate()
-            elif input.main() == "carbon":
-                carbonPathwayUpdate()
-                carbonPointsUpdate()
-            else:
-                raise ValueError("input.main() not in ['overview', 'projects', 'area', 'carbon']")
+        for update in pages[input.main()]:
+            update()
     
 #%% APP
 
@@ -0,0 +1,124 @@
+import importlib
+import pathlib
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+#%% FUNCTIONS
+
+def syntheticRegistry(source, size, seed = 0):
+    rng = np.random.default_rng(seed)
+    df = source.iloc[rng.integers(0, len(source), size)].reset_index(drop = True)
+    scale = rng.lognormal(0, 0.25, size)
+    df["ID"] = SYNTHETIC_ID + np.arange(size)
+    df["Name"] = df["Name"] + " " + pd.Series(np.arange(size)).astype(str)
+    for column in ["Area", "Predicted Emission Reductions", "Predicted Claimable Emission Reductions", *[column for column in df.columns if column.startswith("Subarea")]]:
+        df[column] = pd.to_numeric(df[column], errors = "coerce") * scale
+    for column in ["Latitude", "Longitude"]:
+        df[column] = pd.to_numeric(df[column], errors = "coerce") + rng.normal(0, 0.05, size)
+    return df
+
+def syntheticSelections(store):
+    selections = {column: store["CATEGORIES"][column] for column in app.BREAKDOWN_COLUMNS}
+    selections["Country"] = store["CATEGORIES"]["Country"][0:2]
+    selections["Project Status"] = store["CATEGORIES"]["Project Status"][0:2]
+    return selections
+
+def measure(function, repeats):
+    times = []
+    for _ in range(0, repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(times), peak
+
+def measureStartup(repeats):
+    start = time.perf_counter()
+    module = importlib.import_module("app")
+    cold = time.perf_counter() - start
+    seconds, peak = measure(lambda: importlib.reload(module), repeats)
+    return module, cold, seconds, peak
+
+def benchmarkCalcs(df):
+    store = app.buildStore(df)
+    tables = app.buildTables(store)
+    stamp = {"SIZE": store["SIZE"]}
+    app.saveTables(tables, stamp, BENCHMARK_ARTIFACT)
+    cube = tables["CUBE"]
+    selections = syntheticSelections(store)
+    bitmap = app.facetCounts(tables["FILTER_INDEX"], store, selections)["BITMAP"]
+    rows = app.filterRows(bitmap, store["SIZE"])
+    cells = app.cubeCells(cube, store, selections)
+    cubeSlice = app.sliceCube(cube, cells)
+    ranks = app.rankTotals(store, cube, tables["RANK_WEIGHTS"], cells)
+    previousRanks = app.rankTotals(store, cube, tables["RANK_WEIGHTS"], cells[::2])
+    located = rows[store["LOCATED"][rows]]
+    row = int(rows[len(rows) // 2])
+    mapOrder, mapGroups = app.rankBreakdown(store, "Developer", ranks["Developer"], "LOCATED", "LOCATED")
+    areaOrder, areaGroups = app.rankBreakdown(store, "Developer", ranks["Developer"], "Subarea Area")
+    distributionOrder, distributionGroups = app.rankBreakdown(store, "Country", ranks["Country"], "Area")
+    pathwayOrder, pathwayGroups = app.rankBreakdown(store, "Developer", ranks["Developer"], "Predicted Emission Reductions")
+    sort = {"COLUMN": "Area", "DIRECTION": "DESCENDING"}
+    return {
+        "buildStore": (lambda: app.buildStore(df), 1),
+        "buildTables": (lambda: app.buildTables(store), 1),
+        "buildTableIndex": (lambda: app.buildTableIndex(store), 1),
+        "buildSearchIndex": (lambda: app.buildSearchIndex(store), 1),
+        "buildProjectIndex": (lambda: app.buildProjectIndex(store), BENCHMARK_REPEATS),
+        "indexTables": (lambda: app.indexTables({key: tables[key] for key in ["STORE", "TABLE_INDEX", "SEARCH_INDEX"]}), BENCHMARK_REPEATS),
+        "loadTables": (lambda: app.loadTables(stamp, BENCHMARK_ARTIFACT), BENCHMARK_REPEATS),
+        "updateData": (lambda: app.filterRows(app.facetCounts(tables["FILTER_INDEX"], store, selections)["BITMAP"], store["SIZE"]), BENCHMARK_REPEATS),
+        "updateLabels": (lambda: app.facetCounts(tables["FILTER_INDEX"], store, selections), BENCHMARK_REPEATS),
+        "regionSelection": (lambda: app.regionBitmap(tables["MAP_INDEX"], store, BENCHMARK_REGION), BENCHMARK_REPEATS),
+        "cube": (lambda: app.sliceCube(cube, app.cubeCells(cube, store, selections)), BENCHMARK_REPEATS),
+        "rankStatistics": (lambda: app.updateRankTotals(store, cube, tables["RANK_WEIGHTS"], previousRanks, cells[::2], cells), BENCHMARK_REPEATS),
+        "summary": (lambda: app.buildSummary(store, cubeSlice, rows, ranks), BENCHMARK_REPEATS),
+        "rankBreakdown": (lambda: app.rankBreakdown(store, "Developer", ranks["Developer"], "Subarea Area"), BENCHMARK_REPEATS),
+        "overviewProjects": (lambda: app.mapMarkers(tables["MAP_INDEX"], store, located), BENCHMARK_REPEATS),
+        "overviewArea": (lambda: app.subareaTreemap(store, "Peatland", app.groupTotals(cubeSlice["SUBAREAS"])[0]), BENCHMARK_REPEATS),
+        "overviewCarbon": (lambda: app.cubePathway(cubeSlice, "Predicted Emission Reductions"), BENCHMARK_REPEATS),
+        "projectsTable": (lambda: [app.tableValues(store, column, app.tableRows(tables["TABLE_INDEX"], store, rows, "", sort)[0:app.TABLE_PAGE_SIZE]) for column in ["Name", "Developer", "Area"]], BENCHMARK_REPEATS),
+        "projectsMap": (lambda: app.mapMarkers(tables["MAP_INDEX"], store, located, None, mapGroups[store["CODES"]["Developer"][located]]), BENCHMARK_REPEATS),
+        "projectsModal": (lambda: app.projectEntry(store, app.projectRow(tables["PROJECT_INDEX"], store["ID"][row])), BENCHMARK_REPEATS),
+        "projectSearch": (lambda: app.searchRows(tables["SEARCH_INDEX"], "moss"), BENCHMARK_REPEATS),
+        "areaBreakdown": (lambda: app.groupTotals(cubeSlice["SUBAREAS"], areaGroups[cubeSlice["CODES"]["Developer"]], len(areaOrder)), BENCHMARK_REPEATS),
+        "areaDistribution": (lambda: app.distributionShapes(store["NUMERIC"]["Area"][rows].astype(np.float64), distributionGroups[store["CODES"]["Country"][rows]], len(distributionOrder)), BENCHMARK_REPEATS),
+        "carbonPathway": (lambda: app.cubePathway(cubeSlice, "Predicted Emission Reductions", pathwayGroups[cubeSlice["CODES"]["Developer"]], len(pathwayOrder)), BENCHMARK_REPEATS),
+        "regionPathway": (lambda: app.pathwaySeries(store, rows, "Predicted Emission Reductions"), BENCHMARK_REPEATS)
+        }
+
+#%% INPUTS
+
+BENCHMARK_SIZES = [1000, 10000, 100000, 1000000]
+
+BENCHMARK_REPEATS = 5
+
+BENCHMARK_REGION = {"range": [[-7, 59], [-2, 55]]}
+
+BENCHMARK_ARTIFACT = pathlib.Path(tempfile.gettempdir()) / "benchmark.npz"
+
+SYNTHETIC_ID = 900000000000000
+
+#%% BENCHMARK
+
+print(f"{'Projects':>10}  {'Calc':<18}{'Time (ms)':>12}{'Peak (MB)':>12}")
+
+app, cold, seconds, peak = measureStartup(BENCHMARK_REPEATS)
+
+print(f"{app.REGISTRY['STORE']['SIZE']:>10}  {'importApp':<18}{cold * 1000:>12.2f}{'':>12}", flush = True)
+print(f"{app.REGISTRY['STORE']['SIZE']:>10}  {'reloadApp':<18}{seconds * 1000:>12.2f}{peak / 2**20:>12.2f}", flush = True)
+
+source = pd.read_csv(app.DATA_SOURCE, keep_default_na = False)
+
+for size in [int(size) for size in sys.argv[1:]] or BENCHMARK_SIZES:
+    for name, (function, repeats) in benchmarkCalcs(syntheticRegistry(source, size)).items():
+        seconds, peak = measure(function, repeats)
+        print(f"{size:>10}  {name:<18}{seconds * 1000:>12.2f}{peak / 2**20:>12.2f}", flush = True)
@@ -0,0 +1,3 @@
+import app
+
+app.saveTables(app.buildTables(app.readStore(app.DATA_SOURCE)), app.registryStamp(app.DATA_SOURCE, app.DATA_METADATA), app.DATA_ARTIFACT)